@@ -0,0 +1,95 @@
+import argparse
+from sumoenv import SumoEnv, sumo_console_args
+from controller import TrafficLightController
+from instrumentation import Instrumentation
+from results_store import store_run
+
+
+class TrafficLightActuated(TrafficLightController):
+    """
+    Kebijakan actuated / max-pressure: fase hijau diputuskan diperpanjang atau diakhiri setiap langkah.
+
+    Tekanan arah = jumlah kendaraan di jalur masuk yang dilayani fase hijaunya (Junction.green_lanes),
+    dibaca dari subscription jalur, jadi O(jalur) per langkah tanpa kueri per kendaraan dan tanpa
+    solver. Setelah min_green, hijau diakhiri bila tekanan arah lain melebihi tekanan arah
+    yang sedang hijau (termasuk gap-out saat jalur hijau kosong); pada max_green selalu diakhiri,
+    lalu kuning yellow_time. Jalur keluar tidak dilanggan, jadi tekanan hanya dihitung dari sisi masuk.
+
+    Fase hijau diset sekali dengan durasi max_green (batas aman di SUMO sendiri), lalu setiap langkah
+    berikutnya dijalankan sebagai fase None sehingga perpanjangan tidak memerlukan panggilan TraCI.
+    """
+    name = 'Lampu Lalu Lintas Actuated (Max-Pressure)'
+
+    def __init__(self, gui_f=False, backend='traci', log_file='actuated_queue_length.txt', env=None, tl_id=None,
+                 instrumentation=None, max_simulation_steps=500, verbosity=2, min_green=20, max_green=60,
+                 yellow_time=5):
+        # Hanya agregat jalur yang dibutuhkan, jadi context subscription per kendaraan tidak dipasang
+        if env is None:
+            env = SumoEnv(label='actuated_sim', gui_f=gui_f, backend=backend, sumo_args=sumo_console_args(verbosity),
+                          per_vehicle=False)
+        super().__init__(env, log_file, tl_id=tl_id, instrumentation=instrumentation,
+                         max_simulation_steps=max_simulation_steps, verbosity=verbosity)
+        if not 0 < min_green <= max_green:
+            raise ValueError(f"Harus 0 < min_green <= max_green: {min_green!r}, {max_green!r}")
+
+        self.min_green = min_green  # Waktu hijau minimum dalam detik
+        self.max_green = max_green  # Waktu hijau maksimum dalam detik
+        self.yellow_time = yellow_time # Durasi fase kuning
+        self.green_lanes = None # (jalur fase hijau 0, jalur fase hijau 2), diambil setelah env.reset()
+
+    def start_episode(self):
+        if self.green_lanes is None:
+            self.green_lanes = (self.junction.green_lanes(0), self.junction.green_lanes(2))
+
+    def decide_cycle(self, snapshot):
+        """Hijau 0 (diperpanjang per langkah), kuning 1, hijau 2 (diperpanjang per langkah), kuning 3."""
+        first_lanes, second_lanes = self.green_lanes
+        for green, yellow, served, opposing in ((0, 1, first_lanes, second_lanes), (2, 3, second_lanes, first_lanes)):
+            with self._section('traffic_light'):
+                self.env.set_traffic_light_phase(green, self.max_green, self.tl_id)
+            elapsed = 0
+            while True:
+                yield None, 1 # Satu langkah lagi dengan sinyal yang sama
+                elapsed += 1
+                if elapsed >= self.max_green:
+                    break
+                if elapsed >= self.min_green:
+                    served_pressure = self.env.get_lane_vehicle_count(served)
+                    opposing_pressure = self.env.get_lane_vehicle_count(opposing)
+                    if opposing_pressure > served_pressure:
+                        break
+            if self.verbosity >= 2:
+                print(f"Step {self.step}: fase hijau {green} selama {elapsed}s")
+            yield yellow, self.yellow_time
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulasi lampu lalu lintas actuated / max-pressure")
+    parser.add_argument('--gui', action='store_true', help="Jalankan sumo-gui (default: sumo headless)")
+    parser.add_argument('--backend', default='traci', choices=SumoEnv.backends)
+    parser.add_argument('--steps', type=int, default=500, help="Langkah simulasi maksimum")
+    parser.add_argument('--route-file', default=None, help="File rute pengganti (default: dari intersection.sumocfg)")
+    parser.add_argument('--seed', type=int, default=None, help="Seed SUMO")
+    parser.add_argument('--log-file', default='actuated_queue_length.txt', help="Log per langkah ('.txt' CSV, '.npz' kolomnar)")
+    parser.add_argument('--min-green', type=int, default=20)
+    parser.add_argument('--max-green', type=int, default=60)
+    parser.add_argument('--yellow-time', type=int, default=5)
+    parser.add_argument('--verbosity', type=int, default=2, choices=[0, 1, 2],
+                        help="0 = senyap, 1 = ringkasan akhir, 2 = rincian per fase")
+    parser.add_argument('--profile', action='store_true', help="Cetak ringkasan instrumentasi di akhir run")
+    parser.add_argument('--trace-file', default=None, help="Trace instrumentasi per langkah (mengaktifkan --profile)")
+    parser.add_argument('--store', default=None, metavar='DIR',
+                        help="Tulis run ke ResultsStore DIR untuk perbandingan.py (membutuhkan --seed)")
+    args = parser.parse_args()
+    if args.store is not None and args.seed is None:
+        parser.error("--store membutuhkan --seed (run di store dikunci per seed)")
+
+    env = SumoEnv(label='actuated_sim', gui_f=args.gui, backend=args.backend, route_file=args.route_file,
+                  seed=args.seed, sumo_args=sumo_console_args(args.verbosity), per_vehicle=False)
+    instrumentation = Instrumentation(trace_file=args.trace_file) if args.profile or args.trace_file else None
+    actuated = TrafficLightActuated(env=env, log_file=args.log_file, instrumentation=instrumentation,
+                                    max_simulation_steps=args.steps, verbosity=args.verbosity,
+                                    min_green=args.min_green, max_green=args.max_green, yellow_time=args.yellow_time)
+    summary = actuated.run()
+    if args.store is not None:
+        print(f"Run disimpan ke {store_run(args.store, 'actuated', args.route_file, args.seed, args.log_file, summary)}")
@@ -0,0 +1,211 @@
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import numpy as np
+
+from sumoenv import SumoEnv
+from traffic_light_csp import TrafficLightCSP
+from statis import TrafficLightStatic
+
+# Skenario permintaan: rendah, sedang (rute bawaan), dan jenuh (antrian penyisipan menumpuk)
+SCENARIOS = {
+    'low': 'intersection_low.rou.xml',
+    'medium': 'intersection.rou.xml',
+    'saturated': 'intersection_saturated.rou.xml',
+}
+
+
+class Timer:
+    """Mengumpulkan durasi setiap panggilan (detik) untuk satu operasi."""
+    def __init__(self):
+        self.samples = []
+
+    @contextlib.contextmanager
+    def measure(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples.append(time.perf_counter() - start)
+
+    def wrap(self, method):
+        """Membungkus method instance sehingga setiap panggilannya diukur."""
+        def wrapper(*args, **kwargs):
+            with self.measure():
+                return method(*args, **kwargs)
+        return wrapper
+
+    def stats(self):
+        """Statistik dalam mikrodetik: jumlah panggilan, total, rata-rata, median, p95, min, maks."""
+        if not self.samples:
+            return {'calls': 0}
+        samples = np.array(self.samples) * 1e6
+        return {
+            'calls': len(samples),
+            'total_us': float(samples.sum()),
+            'mean_us': float(samples.mean()),
+            'median_us': float(np.median(samples)),
+            'p95_us': float(np.percentile(samples, 95)),
+            'min_us': float(samples.min()),
+            'max_us': float(samples.max()),
+        }
+
+
+def _make_env(label, route_file, seed, backend, output_dir):
+    # Output detektor setiap run dipisahkan dengan --output-prefix; headless, tanpa log per langkah
+    return SumoEnv(label=label, gui_f=False, backend=backend, route_file=route_file, seed=seed,
+                   sumo_args=['--output-prefix', os.path.join(output_dir, label + '_'),
+                              '--no-step-log', '--no-warnings'])
+
+
+def bench_env(route_file, steps, repeats, seed, backend, output_dir):
+    """
+    Mengukur SumoEnv.reset (peluncuran ulang SUMO) sebanyak repeats kali, lalu simulation_step,
+    get_state, dan get_waiting_time pada setiap langkah dari satu episode dengan program lampu bawaan.
+    get_waiting_time dipanggil pertama pada setiap langkah, jadi mencakup perhitungan StepSnapshot.
+    """
+    timers = {name: Timer() for name in ('reset', 'simulation_step', 'get_waiting_time', 'get_state')}
+    env = _make_env('bench_env', route_file, seed, backend, output_dir)
+    try:
+        for _ in range(repeats):
+            with timers['reset'].measure():
+                env.reset()
+        out = np.zeros(env.state_size, dtype=np.float32)
+        for _ in range(steps):
+            with timers['simulation_step'].measure():
+                env.simulation_step()
+            with timers['get_waiting_time'].measure():
+                env.get_waiting_time()
+            with timers['get_state'].measure():
+                env.get_state(out=out)
+    finally:
+        env.close()
+    return {name: timer.stats() for name, timer in timers.items()}
+
+
+def bench_controller(controller, route_file, steps, seed, backend, output_dir):
+    """
+    Satu episode penuh satu pengendali: waktu dinding episode, ringkasan hasil, dan untuk CSP juga
+    _get_current_lane_metrics (per langkah), penyelesaian CSP per siklus, dan perencanaan siklus lengkap.
+    """
+    env = _make_env(f'bench_{controller}', route_file, seed, backend, output_dir)
+    timers = {}
+    if controller == 'csp':
+        sim = TrafficLightCSP(env=env, log_file=os.devnull, max_simulation_steps=steps, verbosity=0)
+        for name, owner, attr in (('lane_metrics', sim, '_get_current_lane_metrics'),
+                                  ('csp_solve', sim.green_split, 'solve'),
+                                  ('plan_cycle', sim, '_plan_cycle')):
+            timers[name] = Timer()
+            setattr(owner, attr, timers[name].wrap(getattr(owner, attr)))
+    else:
+        sim = TrafficLightStatic(env=env, log_file=os.devnull, max_simulation_steps=steps, verbosity=0)
+    random.seed(seed) # Eksplorasi RL mengikuti seed
+
+    start = time.perf_counter()
+    summary = sim.run()
+    result = {'episode_wall_time_s': time.perf_counter() - start, 'summary': summary}
+    result.update({name: timer.stats() for name, timer in timers.items()})
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(scenarios, steps=500, repeats=5, seed=0, backend='traci'):
+    """Menjalankan semua benchmark untuk skenario yang diberikan; mengembalikan dict siap JSON."""
+    results = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'backend': backend,
+            'steps': steps,
+            'repeats': repeats,
+            'seed': seed,
+        },
+        'scenarios': {},
+    }
+    with tempfile.TemporaryDirectory() as output_dir:
+        for name in scenarios:
+            route_file = SCENARIOS[name]
+            print(f"Skenario {name} ({route_file})...")
+            results['scenarios'][name] = {
+                'route_file': route_file,
+                'env': bench_env(route_file, steps, repeats, seed, backend, output_dir),
+                'csp': bench_controller('csp', route_file, steps, seed, backend, output_dir),
+                'static': bench_controller('static', route_file, steps, seed, backend, output_dir),
+            }
+    return results
+
+
+def _rows(results):
+    """Baris (skenario, metrik, nilai) yang dibandingkan antar commit: rata-rata per panggilan dan waktu episode."""
+    for scenario, data in results['scenarios'].items():
+        for name, stats in data['env'].items():
+            yield scenario, f'env.{name}', stats.get('mean_us')
+        for controller in ('csp', 'static'):
+            for name, stats in data[controller].items():
+                if name == 'episode_wall_time_s':
+                    yield scenario, f'{controller}.episode', stats * 1e6
+                elif name != 'summary':
+                    yield scenario, f'{controller}.{name}', stats.get('mean_us')
+
+
+def print_results(results, baseline=None):
+    """Mencetak rata-rata per panggilan (us); dengan baseline juga rasio terhadap hasil sebelumnya."""
+    previous = {(scenario, metric): value for scenario, metric, value in _rows(baseline)} if baseline else {}
+    header = f"{'skenario':<10} {'metrik':<24} {'rata2 (us)':>14}"
+    if baseline:
+        header += f" {'baseline (us)':>14} {'rasio':>7}"
+    print(header)
+    for scenario, metric, value in _rows(results):
+        if value is None:
+            continue
+        line = f"{scenario:<10} {metric:<24} {value:>14.1f}"
+        old = previous.get((scenario, metric))
+        if old:
+            line += f" {old:>14.1f} {value / old:>7.2f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark jalur panas SumoEnv dan pengendali (headless, hasil JSON)")
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--steps', type=int, default=500)
+    parser.add_argument('--repeats', type=int, default=5, help="Jumlah pengukuran SumoEnv.reset per skenario")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--backend', default='traci', choices=SumoEnv.backends)
+    parser.add_argument('--output', default=None,
+                        help="File JSON hasil (default: benchmarks/<commit>_<waktu>.json)")
+    parser.add_argument('--compare', default=None, help="File JSON hasil sebelumnya untuk dibandingkan")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.scenarios, args.steps, args.repeats, args.seed, args.backend)
+
+    output = args.output
+    if output is None:
+        stamp = results['meta']['timestamp'].replace(':', '').replace('-', '')
+        output = os.path.join('benchmarks', f"{results['meta']['commit'] or 'nocommit'}_{stamp}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    print(f"\nHasil disimpan ke {output}")
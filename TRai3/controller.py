@@ -0,0 +1,296 @@
+import contextlib
+import sys
+
+from step_logger import StepLogger
+from vehicle_tracker import VehicleTracker
+
+
+class TrafficLightController:
+    """
+    Mesin pengendali lampu lalu lintas bersama: loop langkah simulasi, metrik persimpangan,
+    pelacakan kendaraan, log per langkah, instrumentasi, dan ringkasan episode.
+
+    Kebijakan waktu (statis, CSP+RL, dan kebijakan lain) cukup mengimplementasikan
+    decide_cycle(snapshot), yang mengembalikan urutan (fase, durasi) untuk satu siklus.
+    Hook opsional: start_episode() setelah env.reset(), observe_step(snapshot) setiap langkah,
+    dan end_cycle() setelah semua fase siklus selesai dijalankan. Fase None berarti sinyal yang sedang
+    berjalan dilanjutkan durasi langkah tanpa panggilan TraCI; dengan decide_cycle berupa generator,
+    kebijakan dapat memutuskan setiap langkah (lihat actuated.py).
+
+    sample_interval > 1 mengaktifkan mode fast-forward: setiap pemanggilan memajukan simulasi hingga
+    sample_interval langkah (tidak melewati batas fase) dengan satu simulationStep(targetTime).
+    Metrik dibaca sekali per sampel dan waktu tunggunya dianggap berlaku untuk semua langkah sampel
+    itu; log per langkah berisi satu baris per sampel. Nilai >= fase terpanjang berarti satu panggilan
+    TraCI per fase. Ringkasannya hanya perkiraan (kendaraan yang berangkat dan tiba di dalam satu
+    sampel tidak terhitung, waktu tunggu sampel ditahan sepanjang sampel), jadi ditandai
+    'approximate' dan tidak boleh disimpan ke ResultsStore atau diperingkat. Metrik per langkah yang
+    tepat tetap tersedia dari output SUMO sendiri (mis. output detektor e1, lihat detectors.load_detector_output).
+    """
+    # Judul ringkasan episode di konsol
+    name = 'Pengendali Lampu Lalu Lintas'
+    # Kolom log per langkah (nama, format printf); baris ditulis oleh _log_step
+    log_columns = [
+        ('step', '%d'), ('total_halting_vehicles', '%d'), ('total_waiting_time_step', '%s'),
+        ('ns_queue', '%d'), ('ew_queue', '%d'),
+        ('ns_avg_wait_current', '%.2f'), ('ew_avg_wait_current', '%.2f'),
+    ]
+
+    def __init__(self, env, log_file, tl_id=None, instrumentation=None, max_simulation_steps=500, verbosity=2,
+                 sample_interval=1):
+        if sample_interval < 1:
+            raise ValueError(f"sample_interval harus >= 1: {sample_interval!r}")
+        self.env = env
+        # ID lampu lalu lintas yang dikendalikan; None = persimpangan utama env (jaringan satu persimpangan).
+        # Jalur NS/EW dan fase hijaunya dibaca dari junction setelah env.reset()
+        self.tl_id = tl_id
+
+        # Tingkat keluaran konsol: 0 = senyap (hanya kesalahan), 1 = ringkasan akhir episode,
+        # 2 = rincian keputusan setiap siklus
+        self.verbosity = verbosity
+
+        # Metrik simulasi
+        self.step = 0 # Langkah simulasi saat ini
+        self.total_vehicles_departed = 0 # Total kendaraan yang telah menyelesaikan perjalanan
+        self.total_waiting_time = 0.0 # Waktu tunggu akumulatif semua kendaraan
+        # Waktu tempuh kendaraan sebagai agregat berjalan; hanya kendaraan di jaringan yang disimpan per ID
+        self.vehicles = VehicleTracker()
+
+        # Metrik lalu lintas saat ini untuk logging dan keputusan kebijakan
+        self.current_ns_waiting_time = 0.0
+        self.current_ew_waiting_time = 0.0
+        self.current_ns_queue_length = 0
+        self.current_ew_queue_length = 0
+
+        # Langkah simulasi maksimum
+        self.max_simulation_steps = max_simulation_steps
+        # Langkah simulasi per pembacaan metrik (1 = setiap langkah)
+        self.sample_interval = sample_interval
+
+        # File log per langkah ('.txt' untuk CSV, '.npz' untuk format kolomnar biner)
+        self.log_file = log_file
+        self.logger = None
+
+        # Hook instrumentasi opsional (instrumentation.Instrumentation): waktu per bagian dan round-trip TraCI
+        self.instrumentation = instrumentation
+
+    # --- Titik ekstensi kebijakan ---
+
+    def decide_cycle(self, snapshot):
+        """
+        Memutuskan satu siklus dari StepSnapshot saat ini; mengembalikan urutan (fase, durasi).
+        Harus diimplementasikan oleh kebijakan.
+        """
+        raise NotImplementedError
+
+    def start_episode(self):
+        """Dipanggil setelah env.reset() di awal episode."""
+
+    def observe_step(self, snapshot):
+        """Dipanggil setiap langkah simulasi dengan snapshot langkah tersebut."""
+
+    def end_cycle(self):
+        """Dipanggil setelah semua fase dari decide_cycle selesai (tidak dipanggil untuk siklus terpotong)."""
+
+    # --- Mesin bersama ---
+
+    def reset_episode(self):
+        """
+        Mengatur ulang metrik per episode sebelum simulasi baru.
+        Keadaan kebijakan (mis. tabel-Q dan epsilon) dipertahankan antar episode.
+        """
+        self.step = 0
+        self.total_vehicles_departed = 0
+        self.total_waiting_time = 0.0
+        self.vehicles.reset()
+        self.current_ns_waiting_time = 0.0
+        self.current_ew_waiting_time = 0.0
+        self.current_ns_queue_length = 0
+        self.current_ew_queue_length = 0
+
+    def _section(self, name):
+        """Konteks pengukuran bagian name untuk instrumentasi (konteks kosong jika tidak ada instrumentasi)."""
+        if self.instrumentation is None:
+            return contextlib.nullcontext()
+        return self.instrumentation.section(name)
+
+    def _update_vehicle_metrics(self, steps=1):
+        """
+        Memperbarui metrik terkait keberangkatan kendaraan dan waktu tempuh setelah simulasi maju steps langkah.
+        Untuk satu langkah hanya kendaraan yang berangkat/tiba pada langkah ini yang diproses; setelah
+        beberapa langkah sekaligus, daftar kendaraan di jaringan dibandingkan dengan sampel sebelumnya.
+        """
+        if steps == 1:
+            self.vehicles.update(self.step, self.env.get_departed_ids(), self.env.get_arrived_ids())
+        else:
+            self.vehicles.sync(self.step + steps - 1, self.env.get_vehicle_ids())
+
+    def _get_current_lane_metrics(self):
+        """
+        Memperbarui panjang antrian dan waktu tunggu saat ini untuk jalur NS dan EW,
+        lalu mengembalikan StepSnapshot langkah ini.
+        """
+        # Semua konsumen (logging, kebijakan, hadiah) membaca StepSnapshot yang sama,
+        # yang dihitung SumoEnv sekali per langkah simulasi
+        snapshot = self.env.get_snapshot(self.tl_id)
+        self.current_ns_waiting_time = snapshot.ns_avg_wait
+        self.current_ew_waiting_time = snapshot.ew_avg_wait
+        self.current_ns_queue_length = snapshot.ns_queue
+        self.current_ew_queue_length = snapshot.ew_queue
+        return snapshot
+
+    @property
+    def junction(self):
+        """Junction yang dikendalikan (persimpangan utama env jika tl_id None)."""
+        return self.env.junctions[self.tl_id or self.env.tl_id]
+
+    def open_logger(self):
+        """Membuka (dan mengosongkan) log per langkah; dipanggil di awal setiap episode."""
+        self.logger = StepLogger(self.log_file, self.log_columns)
+        return self.logger
+
+    def _log_step(self, snapshot):
+        """Menambahkan baris log langkah saat ini sesuai log_columns."""
+        self.logger.log(self.step, snapshot.halting, snapshot.waiting_time,
+                        self.current_ns_queue_length, self.current_ew_queue_length,
+                        self.current_ns_waiting_time, self.current_ew_waiting_time)
+
+    def _run_phase(self, phase_duration, phase_id):
+        """
+        Menjalankan satu fase lampu lalu lintas untuk durasi yang diberikan.
+        Memajukan simulasi SUMO langkah demi langkah.
+        """
+        if phase_id is not None:
+            with self._section('traffic_light'):
+                self.env.set_traffic_light_phase(phase_id, phase_duration, self.tl_id)
+        remaining = int(phase_duration)
+        # Berhenti jika fase selesai atau langkah simulasi maksimum tercapai
+        while remaining > 0 and self.step < self.max_simulation_steps:
+            steps = min(self.sample_interval, remaining, self.max_simulation_steps - self.step)
+            with self._section('simulation_step'):
+                self.env.simulation_step(steps) # Majukan simulasi SUMO satu langkah (atau satu sampel)
+            with self._section('metrics'):
+                self._update_vehicle_metrics(steps) # Perbarui metrik pelacakan kendaraan
+            self.record_step(steps)
+            remaining -= steps
+
+    def record_step(self, steps=1):
+        """
+        Mencatat metrik persimpangan untuk langkah simulasi yang baru saja dijalankan
+        (atau sampel terakhir dari steps langkah yang dijalankan sekaligus). Dipanggil oleh run(), atau
+        oleh pemanggil yang memajukan simulasi sendiri untuk beberapa pengendali (lihat multi_junction.py).
+        """
+        with self._section('metrics'):
+            # Perbarui metrik jalur saat ini; snapshot yang sama dipakai untuk logging
+            snapshot = self._get_current_lane_metrics()
+            if steps == 1:
+                self.total_waiting_time += snapshot.waiting_time
+            else:
+                # Sampel dianggap berlaku untuk semua langkah yang dilompati
+                self.total_waiting_time += snapshot.waiting_time * steps
+            self.observe_step(snapshot)
+        self.step += steps - 1 # Baris log dan instrumentasi memakai langkah terakhir sampel
+
+        # Tambahkan data langkah simulasi saat ini ke buffer log
+        with self._section('logging'):
+            self._log_step(snapshot)
+        if self.instrumentation is not None:
+            self.instrumentation.end_step(self.step)
+        self.step += 1 # Tambah penghitung langkah simulasi
+
+    def _close_cycle(self):
+        self.end_cycle()
+        if self.instrumentation is not None:
+            self.instrumentation.end_cycle()
+
+    def cycle_phases(self):
+        """
+        Generator siklus untuk menjalankan beberapa pengendali dalam satu langkah simulasi
+        (lihat multi_junction.py): menghasilkan (fase, durasi) secara berurutan, dan end_cycle
+        dipanggil setelah fase terakhir siklus selesai dijalankan oleh pemanggil.
+        """
+        while True:
+            yield from self.decide_cycle(self._get_current_lane_metrics())
+            self._close_cycle()
+
+    def run(self, close_env=True):
+        """
+        Loop simulasi utama (satu episode): setiap siklus diputuskan oleh decide_cycle lalu
+        fase-fasenya dijalankan langkah demi langkah. Dengan close_env=False koneksi SUMO dibiarkan
+        terbuka untuk episode berikutnya (mis. reset cepat dengan SumoEnv reset_mode='state').
+        Kesalahan selama simulasi diteruskan ke pemanggil setelah log (dan env) ditutup.
+        """
+        self.reset_episode()
+        if self.instrumentation is not None:
+            self.instrumentation.start()
+        with self._section('reset'):
+            self.env.reset() # Atur ulang lingkungan simulasi SUMO
+        if self.instrumentation is not None:
+            self.instrumentation.attach(self.env) # Koneksi baru setelah reset
+        self.vehicles.reset(self.step, self.env.sim.vehicle.getIDList()) # Kendaraan yang sudah ada sejak reset
+        self.start_episode()
+
+        self.open_logger() # Inisialisasi/bersihkan file log
+
+        try:
+            while self.step < self.max_simulation_steps:
+                for phase_id, duration in self.decide_cycle(self._get_current_lane_metrics()):
+                    self._run_phase(duration, phase_id)
+                    if self.step >= self.max_simulation_steps:
+                        break # Simulasi berakhir di tengah siklus
+                else:
+                    self._close_cycle()
+
+            # Hitung ulang total kendaraan yang berangkat, karena beberapa mungkin telah tiba di siklus terakhir
+            summary = self.get_summary()
+            self.total_vehicles_departed = summary['vehicles_departed']
+            if self.verbosity >= 1:
+                self.print_summary(summary)
+            if self.instrumentation is not None:
+                self.instrumentation.report() # Diminta eksplisit, jadi dicetak pada semua tingkat verbosity
+        except Exception as e:
+            # Diteruskan ke pemanggil setelah pembersihan: ringkasan run yang terpotong tidak boleh
+            # terlihat seperti run yang selesai (mis. di summary.csv eksperimen)
+            print(f"Simulasi dihentikan dengan kesalahan pada langkah {self.step}: {e}")
+            raise
+        finally:
+            self.logger.close() # Tulis sisa buffer log ke file
+            if self.instrumentation is not None:
+                self.instrumentation.close() # Tulis sisa trace per langkah
+            if close_env:
+                self.env.close() # Tutup koneksi lingkungan SUMO
+                if self.verbosity >= 1:
+                    print("Koneksi TraCI berhasil ditutup")
+            sys.stdout.flush() # Pastikan semua pernyataan print sudah di-flush ke konsol
+        return self.get_summary()
+
+    def print_summary(self, summary):
+        if summary['vehicles_departed'] > 0:
+            print(f"\n--- Ringkasan Simulasi ({self.name}) ---")
+            print(f"Simulasi berakhir pada langkah {self.step}. Total kendaraan berangkat: {summary['vehicles_departed']}")
+            print(f"Total waktu tunggu: {self.total_waiting_time:.2f}s, Waktu tunggu rata-rata per kendaraan: {summary['avg_waiting_time']:.2f}s")
+            print(f"Total waktu tempuh: {summary['total_travel_time']:.2f}s, Waktu tempuh rata-rata per kendaraan: {summary['avg_travel_time']:.2f}s")
+            print(f"Throughput: {summary['throughput']:.4f} kendaraan/langkah")
+            if summary['approximate']:
+                print(f"Catatan: fast-forward (sample_interval={self.sample_interval}), angka di atas hanya perkiraan")
+        else:
+            print("Tidak ada kendaraan yang berangkat selama simulasi.")
+
+    def get_summary(self):
+        """
+        Mengembalikan ringkasan metrik simulasi sebagai dict.
+        Dipakai untuk cetak ringkasan dan tabel hasil eksperimen. 'approximate' bernilai True pada
+        mode fast-forward (sample_interval > 1).
+        """
+        departed = self.vehicles.count
+        total_travel_time = self.vehicles.total
+        return {
+            'steps': self.step,
+            'vehicles_departed': departed,
+            'total_waiting_time': self.total_waiting_time,
+            'avg_waiting_time': self.total_waiting_time / departed if departed > 0 else 0.0,
+            'total_travel_time': total_travel_time,
+            'avg_travel_time': total_travel_time / departed if departed > 0 else 0.0,
+            'std_travel_time': self.vehicles.std,
+            'throughput': departed / self.step if self.step > 0 else 0.0,
+            'approximate': self.sample_interval > 1,
+        }
@@ -0,0 +1,114 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sumoenv import SumoEnv
+from traffic_light_csp import TrafficLightCSP
+
+
+def _timed(method, totals, key):
+    """Membungkus method instance agar waktu eksekusi dan jumlah panggilannya dicatat di totals."""
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            totals[key] += time.perf_counter() - start
+            totals[key + '_calls'] += 1
+    return wrapper
+
+
+def run_mode(demand_source, seed, max_steps=500, backend='traci', output_dir=None):
+    """
+    Menjalankan satu episode CSP headless dengan sumber permintaan tertentu dan mengembalikan
+    ringkasan ditambah biaya: waktu per langkah simulasi, waktu membaca metrik per langkah,
+    dan waktu per keputusan (perencanaan satu siklus), serta split hijau (NS, EW) setiap siklus.
+    """
+    # Output detektor ditulis ke output_dir agar detector_output.xml di folder kerja tidak tertimpa
+    prefix = os.path.join(output_dir or tempfile.gettempdir(), f'demand_{demand_source}_seed{seed}_')
+    env = SumoEnv(label=f'demand_{demand_source}_{seed}', gui_f=False, backend=backend, seed=seed,
+                  sumo_args=['--no-step-log', '--no-warnings', '--output-prefix', prefix],
+                  per_vehicle=demand_source == 'vehicles')
+    sim = TrafficLightCSP(env=env, log_file=os.devnull, demand_source=demand_source,
+                          max_simulation_steps=max_steps, verbosity=0)
+    random.seed(seed)
+
+    totals = {'record': 0.0, 'record_calls': 0, 'plan': 0.0, 'plan_calls': 0}
+    splits = []
+    plan_cycle = sim._plan_cycle
+
+    def plan_and_record():
+        state, action_index, green_ns, green_ew = plan_cycle()
+        splits.append((green_ns, green_ew))
+        return state, action_index, green_ns, green_ew
+
+    sim.record_step = _timed(sim.record_step, totals, 'record')
+    sim._plan_cycle = _timed(plan_and_record, totals, 'plan')
+
+    start = time.perf_counter()
+    summary = sim.run()
+    wall_time = time.perf_counter() - start
+
+    summary.update({
+        'demand_source': demand_source,
+        'seed': seed,
+        'wall_time': wall_time,
+        'ms_per_step': 1000 * wall_time / max(summary['steps'], 1),
+        'ms_per_record': 1000 * totals['record'] / max(totals['record_calls'], 1),
+        'ms_per_decision': 1000 * totals['plan'] / max(totals['plan_calls'], 1),
+        'decisions': totals['plan_calls'],
+        'splits': splits,
+    })
+    return summary
+
+
+def mean(rows, key):
+    return sum(row[key] for row in rows) / len(rows)
+
+
+def split_differences(first, second):
+    """Jumlah siklus dengan split hijau berbeda antara dua run seed yang sama, dan jumlah siklus terbanyak."""
+    differing = sum(a != b for a, b in zip(first['splits'], second['splits']))
+    differing += abs(len(first['splits']) - len(second['splits']))
+    return differing, max(len(first['splits']), len(second['splits']))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Membandingkan metrik permintaan CSP per kendaraan vs detektor: biaya dan kualitas kendali")
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0, 1, 2])
+    parser.add_argument('--steps', type=int, default=500)
+    parser.add_argument('--backend', default='traci', choices=SumoEnv.backends)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for demand_source in ('vehicles', 'detectors'):
+            results[demand_source] = [run_mode(demand_source, seed, args.steps, args.backend, output_dir)
+                                      for seed in args.seeds]
+
+    print(f"Rata-rata {len(args.seeds)} seed, {args.steps} langkah per episode")
+    print(f"{'sumber':<10} {'ms/langkah':>11} {'ms/metrik':>10} {'ms/keputusan':>13} {'keputusan':>10} "
+          f"{'tunggu rata2':>13} {'tempuh rata2':>13} {'throughput':>11}")
+    for demand_source, rows in results.items():
+        print(f"{demand_source:<10} {mean(rows, 'ms_per_step'):>11.3f} {mean(rows, 'ms_per_record'):>10.3f} "
+              f"{mean(rows, 'ms_per_decision'):>13.3f} {mean(rows, 'decisions'):>10.1f} "
+              f"{mean(rows, 'avg_waiting_time'):>13.2f} {mean(rows, 'avg_travel_time'):>13.2f} "
+              f"{mean(rows, 'throughput'):>11.3f}")
+
+    # Kualitas kendali hanya dapat dibandingkan jika sumber permintaan benar-benar mengubah keputusan CSP
+    print()
+    differing = cycles = 0
+    for vehicles_row, detectors_row in zip(results['vehicles'], results['detectors']):
+        seed_differing, seed_cycles = split_differences(vehicles_row, detectors_row)
+        differing += seed_differing
+        cycles += seed_cycles
+    for demand_source, rows in results.items():
+        distinct = sorted({split for row in rows for split in row['splits']})
+        print(f"Split hijau (NS, EW) {demand_source}: {', '.join(f'{ns}/{ew}' for ns, ew in distinct)}")
+    print(f"Siklus dengan split berbeda antar sumber: {differing} dari {cycles}")
+    if differing == 0:
+        print("Peringatan: kedua sumber menghasilkan split yang sama di setiap siklus, jadi kolom kualitas "
+              "kendali tidak membedakan sumber permintaan (perbandingan degenerate)")
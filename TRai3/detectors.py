@@ -0,0 +1,213 @@
+import argparse
+import math
+import xml.etree.ElementTree as ET
+import numpy as np
+
+# Besaran per interval detektor e1 (induction loop)
+DETECTOR_FIELDS = ('vehicles', 'flow', 'occupancy', 'speed')
+
+
+def read_detector_lanes(additional_file='detector.add.xml'):
+    """Membaca definisi <e1Detector> dan mengembalikan dict ID detektor -> ID jalur (urutan file)."""
+    return {elem.get('id'): elem.get('lane')
+            for elem in ET.parse(additional_file).getroot().iter('e1Detector')}
+
+
+def read_detector_interval(additional_file='detector.add.xml'):
+    """
+    Membaca interval agregasi (atribut freq, atau period pada SUMO baru) definisi <e1Detector>,
+    dalam detik. Semua detektor harus memakai interval yang sama.
+    """
+    intervals = {float(elem.get('freq', elem.get('period', 'nan')))
+                 for elem in ET.parse(additional_file).getroot().iter('e1Detector')}
+    if len(intervals) != 1 or any(math.isnan(value) for value in intervals):
+        raise ValueError(f"Detektor e1 di {additional_file} harus punya satu freq yang sama: {sorted(intervals)}")
+    return intervals.pop()
+
+
+def iter_intervals(path):
+    """
+    Membaca elemen <interval> dari output e1Detector (mis. detector_output.xml) secara streaming.
+    Menghasilkan tuple (begin, end, id, kendaraan, flow, occupancy, speed). Elemen yang sudah dibaca
+    dibuang dari pohon, jadi memori tetap kecil untuk file berukuran GB. Kecepatan -1 dari SUMO
+    (tidak ada kendaraan) dikembalikan sebagai nan.
+    """
+    context = ET.iterparse(path, events=('start', 'end'))
+    _, root = next(context)
+    for event, elem in context:
+        if event == 'end' and elem.tag == 'interval':
+            speed = float(elem.get('speed'))
+            yield (float(elem.get('begin')), float(elem.get('end')), elem.get('id'),
+                   int(elem.get('nVehContrib')), float(elem.get('flow')), float(elem.get('occupancy')),
+                   speed if speed >= 0 else math.nan)
+            root.clear()
+
+
+class DetectorAggregator:
+    """
+    Mengubah interval detektor menjadi deret waktu per detektor (baris = interval, kolom = detektor)
+    ditambah total berjalan per detektor.
+
+    Dengan window=N hanya N interval terakhir yang disimpan (buffer melingkar, memori tetap);
+    tanpa window deret waktu disimpan seluruhnya dalam array yang tumbuh berlipat. Total berjalan
+    selalu mencakup semua interval.
+    """
+    def __init__(self, detector_ids, window=None, capacity=64):
+        self.detector_ids = list(detector_ids)
+        self._columns = {det_id: i for i, det_id in enumerate(self.detector_ids)}
+        self.window = window
+        self.rows = 0 # Jumlah interval yang sudah diterima
+        self._capacity = window or capacity
+        self._begin = np.full(self._capacity, math.nan)
+        self._end = np.full(self._capacity, math.nan)
+        self._data = {field: np.full((self._capacity, len(self.detector_ids)), math.nan) for field in DETECTOR_FIELDS}
+        self._last_begin = None
+
+        n = len(self.detector_ids)
+        self.total_vehicles = np.zeros(n, dtype=np.int64)
+        self.total_duration = np.zeros(n)
+        self._occupancy_time = np.zeros(n) # Jumlah occupancy x durasi, untuk rata-rata tertimbang waktu
+        self._speed_vehicles = np.zeros(n) # Jumlah kecepatan x kendaraan, untuk rata-rata tertimbang kendaraan
+
+    def _row(self, begin, end):
+        if begin != self._last_begin:
+            self._last_begin = begin
+            if self.window is None and self.rows == self._capacity:
+                self._grow()
+            index = self.rows % self._capacity
+            self._begin[index] = begin
+            self._end[index] = end
+            for values in self._data.values():
+                values[index] = math.nan
+            self.rows += 1
+        return (self.rows - 1) % self._capacity
+
+    def _grow(self):
+        self._capacity *= 2
+        self._begin = np.resize(self._begin, self._capacity)
+        self._end = np.resize(self._end, self._capacity)
+        self._data = {field: np.resize(values, (self._capacity, values.shape[1]))
+                      for field, values in self._data.items()}
+
+    def add(self, begin, end, det_id, vehicles, flow, occupancy, speed):
+        """Menambahkan satu interval satu detektor (detektor yang tidak dikenal diabaikan)."""
+        column = self._columns.get(det_id)
+        if column is None:
+            return
+        row = self._row(begin, end)
+        self._data['vehicles'][row, column] = vehicles
+        self._data['flow'][row, column] = flow
+        self._data['occupancy'][row, column] = occupancy
+        self._data['speed'][row, column] = speed
+
+        self.total_vehicles[column] += vehicles
+        self.total_duration[column] += end - begin
+        self._occupancy_time[column] += occupancy * (end - begin)
+        if vehicles > 0 and not math.isnan(speed):
+            self._speed_vehicles[column] += speed * vehicles
+
+    def arrays(self):
+        """Deret waktu yang tersimpan, urut waktu: dict 'begin', 'end' (T,) dan tiap besaran (T, jumlah detektor)."""
+        count = min(self.rows, self._capacity)
+        order = (np.arange(self.rows - count, self.rows)) % self._capacity
+        result = {'begin': self._begin[order], 'end': self._end[order]}
+        result.update({field: values[order] for field, values in self._data.items()})
+        return result
+
+    def latest(self):
+        """Nilai interval terakhir per detektor sebagai dict besaran -> (jumlah detektor,)."""
+        if self.rows == 0:
+            return None
+        row = (self.rows - 1) % self._capacity
+        return {field: values[row].copy() for field, values in self._data.items()}
+
+    def totals(self):
+        """
+        Agregat seluruh interval per detektor: jumlah kendaraan, flow (kendaraan/jam),
+        occupancy rata-rata (%), dan kecepatan rata-rata tertimbang kendaraan (m/s).
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return {
+                'vehicles': self.total_vehicles.copy(),
+                'flow': np.where(self.total_duration > 0, self.total_vehicles * 3600. / self.total_duration, 0.),
+                'occupancy': np.where(self.total_duration > 0, self._occupancy_time / self.total_duration, 0.),
+                'speed': np.where(self.total_vehicles > 0, self._speed_vehicles / self.total_vehicles, math.nan),
+            }
+
+
+def load_detector_output(path, detector_ids, window=None):
+    """Membaca file output e1Detector secara streaming ke DetectorAggregator."""
+    aggregator = DetectorAggregator(detector_ids, window=window)
+    for interval in iter_intervals(path):
+        aggregator.add(*interval)
+    return aggregator
+
+
+class LiveDetectors:
+    """
+    Agregat detektor yang sama seperti output file, dibaca langsung lewat traci.inductionloop
+    selama simulasi. update() dipanggil setiap langkah; saat interval detektor berakhir, nilai
+    getLastInterval* semua detektor dimasukkan ke aggregator. Di antara batas interval tidak ada
+    panggilan TraCI, jadi biayanya O(detektor) per interval, bukan O(kendaraan) per langkah.
+    Nilainya sama dengan output file (yang dibulatkan 2 desimal), kecuali occupancy interval pertama:
+    SUMO menghitungnya lewat TraCI mulai dari langkah 1, bukan 0.
+    """
+    def __init__(self, env, detector_ids=None, interval=60.0, window=None):
+        # interval harus sama dengan atribut freq detektor (lihat read_detector_interval)
+        self.env = env
+        self.interval = interval
+        self.window = window
+        self.detector_ids = list(detector_ids) if detector_ids is not None else None
+        self.aggregator = None
+        self._next_end = None
+
+    def reset(self):
+        """Dipanggil setelah env.reset(): menyelaraskan batas interval dengan waktu simulasi saat ini."""
+        if self.detector_ids is None:
+            self.detector_ids = list(self.env.sim.inductionloop.getIDList())
+        self.aggregator = DetectorAggregator(self.detector_ids, window=self.window)
+        self._next_end = (math.floor(self.env.get_time() / self.interval) + 1) * self.interval
+
+    def update(self):
+        """Memasukkan interval yang baru selesai ke aggregator; mengembalikan True jika ada interval baru."""
+        time = self.env.get_time()
+        if time < self._next_end:
+            return False
+        # Setelah simulasi dimajukan beberapa langkah sekaligus, TraCI hanya menyimpan interval
+        # terakhir yang selesai; interval yang terlewati di antaranya tidak dapat dibaca lagi
+        end = math.floor(time / self.interval) * self.interval
+        begin = end - self.interval
+        loop = self.env.sim.inductionloop
+        for det_id in self.detector_ids:
+            vehicles = loop.getLastIntervalVehicleNumber(det_id)
+            speed = loop.getLastIntervalMeanSpeed(det_id)
+            self.aggregator.add(begin, end, det_id, vehicles, vehicles * 3600. / self.interval,
+                                loop.getLastIntervalOccupancy(det_id), speed if speed >= 0 else math.nan)
+        self._next_end = end + self.interval
+        return True
+
+    def current(self):
+        """Nilai interval yang sedang berjalan (belum selesai) per detektor: kendaraan, occupancy, speed."""
+        loop = self.env.sim.inductionloop
+        speeds = np.array([loop.getIntervalMeanSpeed(det_id) for det_id in self.detector_ids])
+        return {
+            'vehicles': np.array([loop.getIntervalVehicleNumber(det_id) for det_id in self.detector_ids]),
+            'occupancy': np.array([loop.getIntervalOccupancy(det_id) for det_id in self.detector_ids]),
+            'speed': np.where(speeds >= 0, speeds, math.nan),
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ringkasan output detektor e1 (streaming)")
+    parser.add_argument('output', nargs='?', default='detector_output.xml')
+    parser.add_argument('--additional', default='detector.add.xml')
+    args = parser.parse_args()
+
+    lanes = read_detector_lanes(args.additional)
+    aggregator = load_detector_output(args.output, lanes)
+    totals = aggregator.totals()
+    print(f"{aggregator.rows} interval dibaca dari {args.output}")
+    print(f"{'detektor':<16} {'jalur':<10} {'kendaraan':>9} {'flow (kend/jam)':>16} {'occupancy (%)':>14} {'speed (m/s)':>12}")
+    for i, det_id in enumerate(aggregator.detector_ids):
+        print(f"{det_id:<16} {lanes[det_id]:<10} {totals['vehicles'][i]:>9} {totals['flow'][i]:>16.1f} "
+              f"{totals['occupancy'][i]:>14.2f} {totals['speed'][i]:>12.2f}")
@@ -0,0 +1,130 @@
+import argparse
+import contextlib
+import csv
+import os
+import random
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from sumoenv import SumoEnv
+from traffic_light_csp import TrafficLightCSP
+from statis import TrafficLightStatic
+from actuated import TrafficLightActuated
+from results_store import scenario_name, store_run
+
+# Pengendali yang dapat dijalankan oleh runner eksperimen
+CONTROLLERS = {
+    'csp': TrafficLightCSP,
+    'static': TrafficLightStatic,
+    'actuated': TrafficLightActuated,
+}
+
+SUMMARY_FIELDS = ['controller', 'route_file', 'seed', 'steps', 'vehicles_departed',
+                  'total_waiting_time', 'avg_waiting_time', 'total_travel_time',
+                  'avg_travel_time', 'std_travel_time', 'throughput', 'wall_time']
+
+
+def run_single(controller, route_file, seed, max_steps=500, output_dir='experiments', backend='traci',
+               store_dir=None):
+    """
+    Menjalankan satu simulasi headless (satu pengendali, satu file rute, satu seed)
+    dan mengembalikan baris ringkasan. Dipanggil di dalam proses worker.
+    Dengan store_dir deret per langkah dan ringkasan run juga ditulis ke ResultsStore.
+    Run yang gagal mengembalikan baris dengan field 'error' (traceback ada di <prefix>_console.txt)
+    dan tidak ditulis ke ResultsStore.
+    """
+    run_id = f"{controller}_{scenario_name(route_file)}_seed{seed}"
+    prefix = os.path.join(output_dir, run_id)
+
+    # Label unik per run; port TraCI dipilih otomatis oleh traci.start.
+    # --output-prefix memisahkan output detektor antar run yang berjalan paralel
+    env = SumoEnv(label=run_id, gui_f=False, backend=backend, route_file=route_file, seed=seed,
+                  sumo_args=['--output-prefix', prefix + '_', '--no-step-log', '--no-warnings'])
+    # Konsol per run hanya berisi ringkasan akhir (tanpa cetakan per siklus)
+    log_file = prefix + '_steps.npz'
+    sim = CONTROLLERS[controller](env=env, log_file=log_file, max_simulation_steps=max_steps, verbosity=1)
+    random.seed(seed) # Eksplorasi RL juga mengikuti seed
+
+    row = {'controller': controller, 'route_file': route_file, 'seed': seed}
+    start = time.perf_counter()
+    with open(prefix + '_console.txt', 'w') as console, contextlib.redirect_stdout(console):
+        try:
+            summary = sim.run()
+        except Exception as e:
+            traceback.print_exc(file=console)
+            row['error'] = f"{type(e).__name__}: {e}"
+            return row
+    row.update(summary)
+    row['wall_time'] = time.perf_counter() - start
+    if store_dir is not None:
+        store_run(store_dir, controller, route_file, seed, log_file, row)
+    return row
+
+
+def run_experiments(controllers, route_files, seeds, max_steps=500, output_dir='experiments',
+                    processes=None, backend='traci', store_dir=None):
+    """
+    Menjalankan grid (pengendali x file rute x seed) secara paralel dalam process pool.
+    Mengembalikan daftar baris ringkasan run yang selesai, diurutkan menurut urutan grid;
+    run yang gagal dilaporkan dan dibuang.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    grid = [(controller, route_file, seed)
+            for route_file in route_files
+            for seed in seeds
+            for controller in controllers]
+
+    rows = {}
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = {pool.submit(run_single, controller, route_file, seed, max_steps, output_dir, backend, store_dir):
+                   (controller, route_file, seed)
+                   for controller, route_file, seed in grid}
+        for future in as_completed(futures):
+            key = futures[future]
+            rows[key] = future.result()
+            if 'error' in rows[key]:
+                print(f"GAGAL: {key[0]} {key[1]} seed={key[2]}: {rows[key]['error']}")
+            else:
+                print(f"Selesai: {key[0]} {key[1]} seed={key[2]} ({rows[key]['wall_time']:.1f}s)")
+    failed = [key for key in grid if 'error' in rows[key]]
+    if failed:
+        print(f"{len(failed)} dari {len(grid)} run gagal dan tidak dimasukkan ke ringkasan")
+    return [rows[key] for key in grid if 'error' not in rows[key]]
+
+
+def write_summary(rows, path):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def print_summary(rows):
+    print(f"\n{'controller':<10} {'route_file':<28} {'seed':>5} {'departed':>9} "
+          f"{'avg_wait':>10} {'avg_travel':>11} {'throughput':>11}")
+    for row in rows:
+        print(f"{row['controller']:<10} {row['route_file']:<28} {row['seed']:>5} {row['vehicles_departed']:>9} "
+              f"{row['avg_waiting_time']:>10.2f} {row['avg_travel_time']:>11.2f} {row['throughput']:>11.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Menjalankan eksperimen multi-seed/multi-skenario secara paralel")
+    parser.add_argument('--controllers', nargs='+', default=list(CONTROLLERS), choices=list(CONTROLLERS))
+    parser.add_argument('--routes', nargs='+', default=['intersection.rou.xml'])
+    parser.add_argument('--seeds', nargs='+', type=int, default=list(range(30)))
+    parser.add_argument('--steps', type=int, default=500)
+    parser.add_argument('--processes', type=int, default=None, help="Jumlah proses worker (default: jumlah CPU)")
+    parser.add_argument('--backend', default='traci', choices=SumoEnv.backends)
+    parser.add_argument('--output-dir', default='experiments')
+    parser.add_argument('--store-dir', default=None,
+                        help="Direktori ResultsStore untuk perbandingan.py (default: <output-dir>/store)")
+    args = parser.parse_args()
+
+    store_dir = args.store_dir or os.path.join(args.output_dir, 'store')
+    rows = run_experiments(args.controllers, args.routes, args.seeds, args.steps,
+                           args.output_dir, args.processes, args.backend, store_dir)
+    summary_path = os.path.join(args.output_dir, 'summary.csv')
+    write_summary(rows, summary_path)
+    print_summary(rows)
+    print(f"\nRingkasan disimpan ke {summary_path}")
@@ -0,0 +1,339 @@
+import collections
+import itertools
+import random
+import numpy as np
+from constraint import Problem, BacktrackingSolver
+
+# Prioritas waktu tunggu pada flag batasan
+NO_PRIORITY, NS_PRIORITY, EW_PRIORITY = 0, 1, 2
+
+
+def constraint_flags(ns_waiting_time, ew_waiting_time, ns_queue_length, ew_queue_length):
+    """
+    Menormalkan metrik lalu lintas menjadi flag batasan kondisional CSP, dengan kondisi yang sama
+    seperti di TrafficLightCSP.run:
+    (prioritas waktu tunggu, keseimbangan antrian, EW sangat tinggi, NS sangat tinggi, NS minimum, EW minimum)
+    """
+    priority = NO_PRIORITY
+    if ns_waiting_time > 0 and ew_waiting_time > 0:
+        if ns_waiting_time > ew_waiting_time * 1.5:
+            priority = NS_PRIORITY
+        elif ew_waiting_time > ns_waiting_time * 1.5:
+            priority = EW_PRIORITY
+    return (
+        priority,
+        ns_queue_length > 5 and ew_queue_length > 5,
+        ew_waiting_time >= 25 and ns_waiting_time > 5,
+        ns_waiting_time >= 25 and (ew_queue_length > 0 or ew_waiting_time > 0),
+        ns_waiting_time < 1.0 and ns_queue_length < 5,
+        ew_waiting_time < 1.0 and ew_queue_length < 5,
+    )
+
+
+def _binary_constraints(flags, min_green, max_green, yellow_time, cycle_length):
+    """Batasan biner (ns, ew) dalam urutan yang sama dengan penambahannya ke Problem."""
+    priority, balance, ew_high, ns_high, _, _ = flags
+    constraints = [
+        # Pastikan total panjang siklus tidak melebihi panjang siklus
+        lambda ns, ew: ns + ew + 2 * yellow_time <= cycle_length,
+        # Pastikan kedua fase mendapatkan setidaknya waktu hijau minimum gabungan mereka
+        lambda ns, ew: ns + ew >= 2 * min_green,
+    ]
+    # Prioritaskan arah dengan waktu tunggu yang jauh lebih tinggi
+    if priority == NS_PRIORITY:
+        constraints.append(lambda ns, ew: ns >= ew * 1.05)
+    elif priority == EW_PRIORITY:
+        constraints.append(lambda ns, ew: ew >= ns * 1.05)
+    # Jaga agar waktu hijau relatif seimbang jika kedua antrian signifikan
+    if balance:
+        constraints.append(lambda ns, ew: abs(ns - ew) <= (max_green - min_green) / 2)
+    # Waktu tunggu EW sangat tinggi: NS tetap mendapatkan minimum yang wajar
+    if ew_high:
+        constraints.append(lambda ns, ew: ns >= max(ew * 0.3, min_green + 10))
+    # Waktu tunggu NS sangat tinggi: EW mendapatkan minimum yang wajar dan NS tidak terlalu lama
+    if ns_high:
+        constraints.append(lambda ns, ew: ew >= max(ns * 0.3, min_green + 10))
+        constraints.append(lambda ns, ew: ns <= max_green - 10)
+    return constraints
+
+
+def _domain(target, min_green, max_green):
+    # Domain dipusatkan di sekitar target yang disesuaikan RL, dengan buffer +/- 10 detik
+    return range(max(min_green, target - 10), min(max_green, target + 10) + 1)
+
+
+def build_problem(target_ns, target_ew, flags, min_green, max_green, yellow_time, cycle_length=120):
+    """Membangun Problem python-constraint untuk satu siklus (solver referensi)."""
+    csp = Problem(BacktrackingSolver(forwardcheck=True))
+    csp.addVariable('green_ns', _domain(target_ns, min_green, max_green))
+    csp.addVariable('green_ew', _domain(target_ew, min_green, max_green))
+    for constraint in _binary_constraints(flags, min_green, max_green, yellow_time, cycle_length):
+        csp.addConstraint(constraint, ('green_ns', 'green_ew'))
+    # Paksa arah dengan permintaan sangat rendah ke lampu hijau minimum
+    if flags[4]:
+        csp.addConstraint(lambda ns_val: ns_val == min_green, ('green_ns',))
+    if flags[5]:
+        csp.addConstraint(lambda ew_val: ew_val == min_green, ('green_ew',))
+    return csp
+
+
+# Semua kombinasi flag batasan, dalam urutan indeks tabel
+ALL_FLAGS = list(itertools.product((NO_PRIORITY, NS_PRIORITY, EW_PRIORITY), *[(False, True)] * 5))
+FLAG_INDEX = {flags: index for index, flags in enumerate(ALL_FLAGS)}
+
+# Tabel per (min_green, max_green, yellow_time, cycle_length), dibagi semua GreenSplitTable dalam proses
+_TABLES = {}
+
+
+def _binary_masks(flags, ns, ew, min_green, max_green, yellow_time, cycle_length):
+    """Versi array dari _binary_constraints: satu mask boolean per batasan biner, urutan yang sama."""
+    priority, balance, ew_high, ns_high, _, _ = flags
+    masks = [ns + ew + 2 * yellow_time <= cycle_length, ns + ew >= 2 * min_green]
+    if priority == NS_PRIORITY:
+        masks.append(ns >= ew * 1.05)
+    elif priority == EW_PRIORITY:
+        masks.append(ew >= ns * 1.05)
+    if balance:
+        masks.append(np.abs(ns - ew) <= (max_green - min_green) / 2)
+    if ew_high:
+        masks.append(ns >= np.maximum(ew * 0.3, min_green + 10))
+    if ns_high:
+        masks.append(ew >= np.maximum(ns * 0.3, min_green + 10))
+        masks.append(ns <= max_green - 10)
+    return masks
+
+
+def build_tables(min_green, max_green, yellow_time, cycle_length=120):
+    """
+    Membangun tabel solusi untuk semua (flag, target_ns, target_ew) sekaligus dengan NumPy.
+    Hasil: array int16 berbentuk (len(ALL_FLAGS), n, n, 2) berisi (green_ns, green_ew), atau -1 jika
+    tidak ada solusi; n = max_green - min_green + 1.
+
+    Pencarian BacktrackingSolver ditiru untuk semua sel secara paralel. Untuk nilai variabel pertama
+    (dari akhir domain) setiap nilai variabel kedua diberi indeks batasan pertama yang gagal; solusi
+    adalah nilai feasible yang paling akhir dalam urutan domain saat itu. Setelah backtrack, domain
+    variabel kedua diurutkan stabil menurut indeks batasan gagal tersebut (forward checking
+    mengembalikan nilai per batasan).
+    """
+    values = np.arange(min_green, max_green + 1)
+    n = len(values)
+    width = 21 # Domain maksimum: target +/- 10
+
+    # first_fail[f, i, j]: indeks batasan pertama yang gagal untuk (values[i], values[j]); len(masks) jika lolos
+    first_fail = np.empty((len(ALL_FLAGS), n, n), dtype=np.int8)
+    passed = np.empty(len(ALL_FLAGS), dtype=np.int8)
+    ns_grid, ew_grid = values[:, None], values[None, :]
+    for f, flags in enumerate(ALL_FLAGS):
+        masks = _binary_masks(flags, ns_grid, ew_grid, min_green, max_green, yellow_time, cycle_length)
+        passed[f] = len(masks)
+        first_fail[f] = len(masks)
+        for k in reversed(range(len(masks))):
+            first_fail[f][~np.broadcast_to(masks[k], (n, n))] = k
+
+    # Satu sel per (flag, target_ns, target_ew); domain sebagai rentang indeks [lo, lo + length)
+    f_idx, tn_idx, te_idx = (axis.ravel() for axis in np.meshgrid(np.arange(len(ALL_FLAGS)), np.arange(n),
+                                                                    np.arange(n), indexing='ij'))
+    flag_array = np.array(ALL_FLAGS, dtype=np.int8)
+    ns_lo, ew_lo = np.maximum(tn_idx - 10, 0), np.maximum(te_idx - 10, 0)
+    ns_len = np.minimum(tn_idx + 10, n - 1) - ns_lo + 1
+    ew_len = np.minimum(te_idx + 10, n - 1) - ew_lo + 1
+    # Batasan unary: domain menjadi [min_green] jika ada di domain, selain itu kosong
+    ns_forced, ew_forced = flag_array[f_idx, 4].astype(bool), flag_array[f_idx, 5].astype(bool)
+    ns_len = np.where(ns_forced, (ns_lo == 0).astype(ns_len.dtype), ns_len)
+    ew_len = np.where(ew_forced, (ew_lo == 0).astype(ew_len.dtype), ew_len)
+
+    # Urutan variabel: panjang domain lalu nama ('green_ew' < 'green_ns')
+    ns_first = ns_len < ew_len
+    first_lo, first_len = np.where(ns_first, ns_lo, ew_lo), np.where(ns_first, ns_len, ew_len)
+    second_lo, second_len = np.where(ns_first, ew_lo, ns_lo), np.where(ns_first, ew_len, ns_len)
+
+    table = np.full((len(f_idx), 2), -1, dtype=np.int16)
+    offsets = np.arange(width)
+    active = np.flatnonzero((first_len > 0) & (second_len > 0))
+    # rank[c, j]: posisi nilai ke-j domain kedua dalam urutan domain saat ini
+    rank = np.broadcast_to(offsets, (len(active), width)).copy()
+    for depth in range(width):
+        if len(active) == 0:
+            break
+        first_value = first_lo[active] + first_len[active] - 1 - depth
+        items = second_lo[active, None] + offsets
+        valid = offsets < second_len[active, None]
+        items = np.minimum(items, n - 1)
+        first_col = first_value[:, None]
+        cell_first = ns_first[active, None]
+        fails = first_fail[f_idx[active, None], np.where(cell_first, first_col, items),
+                           np.where(cell_first, items, first_col)]
+        feasible = valid & (fails == passed[f_idx[active]][:, None])
+
+        found = feasible.any(axis=1)
+        best = np.argmax(np.where(feasible, rank, -1), axis=1)
+        cells, chosen = active[found], items[found, best[found]]
+        chosen_first = first_value[found]
+        table[cells, 0] = np.where(ns_first[cells], chosen_first, chosen)
+        table[cells, 1] = np.where(ns_first[cells], chosen, chosen_first)
+
+        # Sel tanpa solusi pada nilai ini: backtrack ke nilai berikutnya dengan domain kedua diurutkan ulang
+        keep = ~found & (depth + 1 < first_len[active])
+        key = np.where(valid, fails.astype(np.int64) * width + rank, np.iinfo(np.int64).max)[keep]
+        rank = np.argsort(np.argsort(key, axis=1, kind='stable'), axis=1, kind='stable')
+        active = active[keep]
+
+    table[table >= 0] += min_green
+    return table.reshape(len(ALL_FLAGS), n, n, 2)
+
+
+def green_split_tables(min_green, max_green, yellow_time, cycle_length=120):
+    """Tabel build_tables untuk parameter ini, dibangun sekali per proses."""
+    key = (min_green, max_green, yellow_time, cycle_length)
+    table = _TABLES.get(key)
+    if table is None:
+        table = _TABLES[key] = build_tables(*key)
+    return table
+
+
+class GreenSplitTable:
+    """
+    Pengganti python-constraint untuk memilih green_ns/green_ew.
+
+    Solusi untuk semua kombinasi (flag, target_ns, target_ew) dibangun sekaligus oleh build_tables
+    dan dibagi semua instance dengan parameter yang sama (green_split_tables), lalu setiap keputusan
+    hanya berupa lookup. Solusi identik dengan Problem.getSolution() (lihat verify()).
+    Target di luar [min_green, max_green] diselesaikan dengan _search.
+    """
+    def __init__(self, min_green, max_green, yellow_time, cycle_length=120):
+        self.min_green = min_green
+        self.max_green = max_green
+        self.yellow_time = yellow_time
+        self.cycle_length = cycle_length
+        self.values = range(min_green, max_green + 1)
+        self._table = green_split_tables(min_green, max_green, yellow_time, cycle_length)
+
+    def solve(self, target_ns, target_ew, flags):
+        """Mengembalikan {'green_ns', 'green_ew'} seperti getSolution(), atau None jika tidak ada solusi."""
+        flags = tuple(flags)
+        if target_ns in self.values and target_ew in self.values:
+            green_ns, green_ew = self._table[FLAG_INDEX[flags], target_ns - self.min_green,
+                                             target_ew - self.min_green].tolist()
+            result = (green_ns, green_ew) if green_ns >= 0 else None
+        else:
+            result = self._search(target_ns, target_ew, flags, self._feasible_sets(flags))
+        if result is None:
+            return None
+        return {'green_ns': result[0], 'green_ew': result[1]}
+
+    def _feasible_sets(self, flags):
+        # feasible[k]: (nilai_ns, nilai_ew) -> lolos batasan biner ke-k, untuk seluruh rentang hijau
+        constraints = _binary_constraints(flags, self.min_green, self.max_green,
+                                          self.yellow_time, self.cycle_length)
+        return [{(ns, ew) for ns in self.values for ew in self.values if constraint(ns, ew)}
+                for constraint in constraints]
+
+    def _search(self, target_ns, target_ew, flags, feasible):
+        domains = {
+            'green_ns': list(_domain(target_ns, self.min_green, self.max_green)),
+            'green_ew': list(_domain(target_ew, self.min_green, self.max_green)),
+        }
+        # Batasan unary dipakai untuk memangkas domain sebelum pencarian (preProcess)
+        if flags[4]:
+            domains['green_ns'] = [v for v in domains['green_ns'] if v == self.min_green]
+        if flags[5]:
+            domains['green_ew'] = [v for v in domains['green_ew'] if v == self.min_green]
+        if not domains['green_ns'] or not domains['green_ew']:
+            return None
+
+        # Jumlah batasan biner sama untuk kedua variabel, jadi urutan ditentukan panjang domain lalu nama
+        first, second = sorted(domains, key=lambda name: (len(domains[name]), name))
+        ns_first = first == 'green_ns'
+        second_domain = domains[second]
+
+        for value in reversed(domains[first]):
+            visible = second_domain
+            hidden = []
+            for allowed in feasible:
+                keep = []
+                for other in visible:
+                    pair = (value, other) if ns_first else (other, value)
+                    if pair in allowed:
+                        keep.append(other)
+                    else:
+                        hidden.append(other)
+                visible = keep
+                if not visible:
+                    break
+            if visible:
+                return (value, visible[-1]) if ns_first else (visible[-1], value)
+            # Backtrack: nilai tersembunyi dikembalikan ke domain sesuai urutan disembunyikan
+            second_domain = hidden
+        return None
+
+
+class CachedCSPSolver:
+    """
+    Solver python-constraint dengan cache LRU atas input batasan yang dinormalkan
+    (target_ns, target_ew, flag). Alternatif untuk GreenSplitTable ketika batasan tidak
+    bisa ditabelkan; pada lalu lintas stabil konfigurasi yang sama berulang setiap siklus.
+    """
+    def __init__(self, min_green, max_green, yellow_time, cycle_length=120, maxsize=256):
+        self.min_green = min_green
+        self.max_green = max_green
+        self.yellow_time = yellow_time
+        self.cycle_length = cycle_length
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache = collections.OrderedDict()
+
+    def solve(self, target_ns, target_ew, flags):
+        """Mengembalikan {'green_ns', 'green_ew'} seperti getSolution(), atau None jika tidak ada solusi."""
+        key = (target_ns, target_ew, tuple(flags))
+        if key in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            result = self._cache[key]
+        else:
+            self.misses += 1
+            solution = build_problem(target_ns, target_ew, key[2], self.min_green, self.max_green,
+                                     self.yellow_time, self.cycle_length).getSolution()
+            result = (solution['green_ns'], solution['green_ew']) if solution else None
+            self._cache[key] = result
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False) # Buang entri yang paling lama tidak dipakai
+        if result is None:
+            return None
+        return {'green_ns': result[0], 'green_ew': result[1]}
+
+    def cache_info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._cache), 'maxsize': self.maxsize}
+
+    def cache_clear(self):
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def verify(min_green=20, max_green=60, yellow_time=5, cycle_length=120, samples=None, seed=0):
+    """
+    Membandingkan GreenSplitTable dengan Problem.getSolution() untuk semua kombinasi
+    (target_ns, target_ew, flag), atau sejumlah sampel acak. Mengembalikan daftar ketidakcocokan.
+    """
+    table = GreenSplitTable(min_green, max_green, yellow_time, cycle_length)
+    targets = range(min_green, max_green + 1)
+    cases = itertools.product(targets, targets, ALL_FLAGS)
+    if samples is not None:
+        cases = random.Random(seed).sample(list(cases), samples)
+
+    mismatches = []
+    for target_ns, target_ew, flags in cases:
+        expected = build_problem(target_ns, target_ew, flags, min_green, max_green,
+                                 yellow_time, cycle_length).getSolution()
+        actual = table.solve(target_ns, target_ew, flags)
+        if expected != actual:
+            mismatches.append((target_ns, target_ew, flags, expected, actual))
+    return mismatches
+
+
+if __name__ == "__main__":
+    mismatches = verify()
+    print(f"Ketidakcocokan dengan python-constraint: {len(mismatches)}")
+    for mismatch in mismatches[:10]:
+        print(mismatch)
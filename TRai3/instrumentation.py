@@ -0,0 +1,174 @@
+import contextlib
+import time
+import numpy as np
+
+from step_logger import StepLogger
+
+# Bagian yang diukur oleh pengendali (waktu dinding inklusif per bagian)
+SECTIONS = ('reset', 'simulation_step', 'traffic_light', 'metrics', 'logging', 'csp_solve', 'rl_update')
+# Bagian yang terjadi sekali per episode; dilaporkan terpisah, tidak masuk angka per siklus
+EPISODE_SECTIONS = ('reset',)
+CYCLE_SECTIONS = tuple(name for name in SECTIONS if name not in EPISODE_SECTIONS)
+
+
+class Instrumentation:
+    """
+    Hook instrumentasi opsional untuk TrafficLightCSP dan TrafficLightStatic.
+
+    Mencatat waktu dinding per bagian (SECTIONS), per langkah dan per siklus, ditambah jumlah dan
+    waktu round-trip TraCI. Round-trip dihitung dengan membungkus _sendExact koneksi traci, jadi
+    waktu 'traci' mencakup socket dan komputasi SUMO (termasuk simulationStep); sisa waktu langkah
+    (di luar reset) adalah waktu Python. Backend libsumo tidak memakai socket, sehingga
+    hanya waktu per bagian yang dicatat. Reset (termasuk round-trip TraCI-nya) terjadi sekali per
+    episode, jadi tidak dihitung pada angka per siklus.
+
+    Dengan trace_file setiap langkah ditulis sebagai satu baris (CSV, atau kolomnar jika '.npz').
+    """
+    def __init__(self, trace_file=None):
+        self.trace_file = trace_file
+        self.trace = None
+        self._clear()
+
+    def _clear(self):
+        self.totals = dict.fromkeys(SECTIONS, 0.0)
+        self.counts = dict.fromkeys(SECTIONS, 0)
+        self.traci_calls = 0
+        self.traci_time = 0.0
+        self.reset_traci_calls = 0 # Bagian dari traci_calls/traci_time yang terjadi di dalam reset
+        self.reset_traci_time = 0.0
+        self.steps = 0
+        self.step_time = 0.0
+        self.cycles = [] # Per siklus: dict bagian (CYCLE_SECTIONS) -> detik, plus 'traci_calls', 'traci' dan 'steps'
+        self._step = dict.fromkeys(SECTIONS, 0.0)
+        self._step_traci_calls = 0
+        self._step_traci_time = 0.0
+        self._step_start = None
+        self._cycle_start = self._cumulative()
+
+    def attach(self, env):
+        """
+        Mulai mengukur round-trip TraCI pada koneksi env saat ini. Dipanggil setelah env.reset(),
+        karena reset dengan peluncuran ulang SUMO membuat koneksi baru.
+        """
+        conn = env.sim
+        if not hasattr(conn, '_sendExact') or getattr(conn._sendExact, 'instrumented', False):
+            return
+        send_exact = conn._sendExact
+
+        def timed_send_exact():
+            start = time.perf_counter()
+            try:
+                return send_exact()
+            finally:
+                self._step_traci_calls += 1
+                self._step_traci_time += time.perf_counter() - start
+        timed_send_exact.instrumented = True
+        conn._sendExact = timed_send_exact
+
+    def start(self):
+        """
+        Dipanggil di awal run(): mengosongkan pengukuran episode sebelumnya, membuka file trace,
+        dan memulai pengukuran langkah pertama.
+        """
+        self._clear()
+        if self.trace_file is not None:
+            self.trace = StepLogger(self.trace_file, [('step', '%d'), ('wall_ms', '%.4f'), ('traci_calls', '%d'),
+                                                      ('traci_ms', '%.4f')] +
+                                    [(name + '_ms', '%.4f') for name in SECTIONS])
+        self._step_start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def section(self, name):
+        start = time.perf_counter()
+        traci_calls, traci_time = self._step_traci_calls, self._step_traci_time
+        try:
+            yield
+        finally:
+            self._step[name] += time.perf_counter() - start
+            self.counts[name] += 1
+            if name in EPISODE_SECTIONS:
+                self.reset_traci_calls += self._step_traci_calls - traci_calls
+                self.reset_traci_time += self._step_traci_time - traci_time
+
+    def end_step(self, step):
+        """Menutup pengukuran langkah step: akumulasi ke total dan siklus, tulis baris trace."""
+        now = time.perf_counter()
+        wall = now - self._step_start
+        self._step_start = now
+        for name, seconds in self._step.items():
+            self.totals[name] += seconds
+        self.traci_calls += self._step_traci_calls
+        self.traci_time += self._step_traci_time
+        self.steps += 1
+        self.step_time += wall
+        if self.trace is not None:
+            self.trace.log(step, wall * 1e3, self._step_traci_calls, self._step_traci_time * 1e3,
+                           *(self._step[name] * 1e3 for name in SECTIONS))
+        self._step = dict.fromkeys(SECTIONS, 0.0)
+        self._step_traci_calls = 0
+        self._step_traci_time = 0.0
+
+    def end_cycle(self):
+        """
+        Menutup satu siklus lampu (empat fase) pengendali. Bagian dari langkah yang belum ditutup
+        (mis. pembaruan RL di akhir siklus) ikut dihitung pada siklus ini.
+        """
+        cumulative = self._cumulative()
+        self.cycles.append({name: cumulative[name] - self._cycle_start[name] for name in cumulative})
+        self._cycle_start = cumulative
+
+    def _cumulative(self):
+        # Total berjalan termasuk langkah yang sedang diukur, tanpa bagian per episode (reset)
+        cumulative = {name: self.totals[name] + self._step[name] for name in CYCLE_SECTIONS}
+        cumulative.update({'traci_calls': self.traci_calls + self._step_traci_calls - self.reset_traci_calls,
+                           'traci': self.traci_time + self._step_traci_time - self.reset_traci_time,
+                           'steps': self.steps})
+        return cumulative
+
+    def close(self):
+        """Dipanggil di akhir run(): menulis sisa trace. Langkah yang belum ditutup tidak dihitung."""
+        if self.trace is not None:
+            self.trace.close()
+            self.trace = None
+
+    def summary(self):
+        """
+        Ringkasan sebagai dict: total dan jumlah panggilan per bagian, TraCI, rata-rata per langkah dan
+        per siklus. Bagian per episode (reset) tidak punya angka per siklus ('per_cycle' None); waktu
+        TraCI-nya dilaporkan terpisah sebagai 'reset_traci_time'.
+        """
+        cycle_totals = {name: [cycle[name] for cycle in self.cycles] for name in CYCLE_SECTIONS + ('traci',)}
+        return {
+            'steps': self.steps,
+            'cycles': len(self.cycles),
+            'step_time': self.step_time,
+            'sections': {name: {'total': self.totals[name], 'calls': self.counts[name],
+                                'per_step': self.totals[name] / self.steps if self.steps else 0.0,
+                                'per_cycle': None if name in EPISODE_SECTIONS else
+                                float(np.mean(cycle_totals[name])) if self.cycles else 0.0}
+                         for name in SECTIONS},
+            'traci_calls': self.traci_calls,
+            'traci_time': self.traci_time,
+            'traci_calls_per_step': self.traci_calls / self.steps if self.steps else 0.0,
+            'traci_per_cycle': float(np.mean(cycle_totals['traci'])) if self.cycles else 0.0,
+            'reset_traci_calls': self.reset_traci_calls,
+            'reset_traci_time': self.reset_traci_time,
+            # Waktu di luar round-trip TraCI, tanpa reset (yang didominasi peluncuran SUMO)
+            'python_time': self.step_time - (self.traci_time - self.reset_traci_time) - self.totals['reset'],
+        }
+
+    def report(self):
+        """Mencetak ringkasan instrumentasi ke konsol."""
+        summary = self.summary()
+        steps = max(summary['steps'], 1)
+        print(f"\n--- Instrumentasi ({summary['steps']} langkah, {summary['cycles']} siklus) ---")
+        print(f"{'bagian':<16} {'total (s)':>10} {'panggilan':>10} {'ms/langkah':>11} {'ms/siklus':>10}")
+        for name, data in summary['sections'].items():
+            if data['calls'] == 0:
+                continue
+            per_cycle = '-' if data['per_cycle'] is None else f"{data['per_cycle'] * 1e3:.3f}"
+            print(f"{name:<16} {data['total']:>10.3f} {data['calls']:>10} {data['per_step'] * 1e3:>11.3f} "
+                  f"{per_cycle:>10}")
+        print(f"Waktu langkah total: {summary['step_time']:.3f}s; TraCI: {summary['traci_calls']} round-trip "
+              f"({summary['traci_calls'] / steps:.1f}/langkah), {summary['traci_time']:.3f}s; "
+              f"Python (tanpa reset): {summary['python_time']:.3f}s")
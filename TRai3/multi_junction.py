@@ -0,0 +1,135 @@
+import argparse
+import os
+import sys
+
+from sumoenv import SumoEnv, sumo_console_args
+from traffic_light_csp import TrafficLightCSP
+from actuated import TrafficLightActuated
+from vehicle_tracker import VehicleTracker
+
+# Pengendali per persimpangan yang dapat dipakai
+CONTROLLERS = {
+    'csp': TrafficLightCSP,
+    'actuated': TrafficLightActuated,
+}
+
+
+class MultiJunctionCSP:
+    """
+    Menjalankan satu pengendali CSP+RL (TrafficLightCSP), atau TrafficLightActuated dengan
+    controller='actuated', per persimpangan berlampu dalam satu simulasi.
+
+    Setiap pengendali menjalankan siklusnya sendiri (TrafficLightCSP.cycle_phases); pada setiap langkah
+    simulasi semua persimpangan dilayani lebih dulu, lalu simulasi dimajukan satu kali dan metrik semua
+    persimpangan dibaca dari hasil subscription langkah yang sama (SumoEnv.get_snapshots).
+    """
+    def __init__(self, env, log_dir='.', csp_solver='table', max_simulation_steps=500, verbosity=2, controller='csp'):
+        if controller not in CONTROLLERS:
+            raise ValueError(f"controller tidak dikenal: {controller!r}")
+        self.env = env
+        self.controller = controller
+        self.log_dir = log_dir
+        self.csp_solver = csp_solver
+        self.controllers = {} # tl_id -> pengendali, dibuat setelah persimpangan ditemukan
+        self.max_simulation_steps = max_simulation_steps
+        self.verbosity = verbosity # Diteruskan ke pengendali per persimpangan (cetakan per siklus)
+
+        self.step = 0
+        self.vehicles = VehicleTracker() # Waktu tempuh dihitung untuk seluruh jaringan, bukan per persimpangan
+
+    def _create_controllers(self):
+        options = {'csp_solver': self.csp_solver} if self.controller == 'csp' else {}
+        for tl_id in self.env.junctions:
+            controller = CONTROLLERS[self.controller](env=self.env, tl_id=tl_id,
+                                                      log_file=os.path.join(self.log_dir, f'queue_length_{tl_id}.txt'),
+                                                      max_simulation_steps=self.max_simulation_steps,
+                                                      verbosity=self.verbosity, **options)
+            self.controllers[tl_id] = controller
+
+    def run(self, close_env=True):
+        """Satu episode untuk semua persimpangan; mengembalikan ringkasan seperti TrafficLightCSP.get_summary()."""
+        cycles = {}
+        remaining = {} # Sisa durasi fase yang sedang berjalan per persimpangan
+        try:
+            self.env.reset() # Persimpangan ditemukan dari jaringan saat simulasi pertama kali dimulai
+            if not self.controllers:
+                self._create_controllers()
+
+            self.step = 0
+            self.vehicles.reset(self.step, self.env.sim.vehicle.getIDList())
+            for tl_id, controller in self.controllers.items():
+                controller.reset_episode()
+                controller.start_episode()
+                controller.open_logger()
+                cycles[tl_id] = controller.cycle_phases()
+                remaining[tl_id] = 0
+
+            while self.step < self.max_simulation_steps:
+                for tl_id in self.controllers:
+                    # Fase habis: ambil fase berikutnya dari siklus (merencanakan siklus baru bila perlu)
+                    while remaining[tl_id] <= 0:
+                        phase, duration = next(cycles[tl_id])
+                        if phase is not None: # None: sinyal yang sedang berjalan dilanjutkan
+                            self.env.set_traffic_light_phase(phase, duration, tl_id)
+                        remaining[tl_id] = int(duration)
+                    remaining[tl_id] -= 1
+
+                self.env.simulation_step()
+                self.vehicles.update(self.step, self.env.get_departed_ids(), self.env.get_arrived_ids())
+                for controller in self.controllers.values():
+                    controller.record_step()
+                self.step += 1
+        finally:
+            # Hanya persimpangan yang log dan siklusnya sudah dibuka pada episode ini
+            for tl_id, cycle in cycles.items():
+                cycle.close()
+                self.controllers[tl_id].logger.close()
+            if close_env:
+                self.env.close()
+            sys.stdout.flush()
+        return self.get_summary()
+
+    def get_summary(self):
+        departed = self.vehicles.count
+        total_travel_time = self.vehicles.total
+        total_waiting_time = sum(controller.total_waiting_time for controller in self.controllers.values())
+        return {
+            'steps': self.step,
+            'vehicles_departed': departed,
+            'total_waiting_time': total_waiting_time,
+            'avg_waiting_time': total_waiting_time / departed if departed > 0 else 0.0,
+            'total_travel_time': total_travel_time,
+            'avg_travel_time': total_travel_time / departed if departed > 0 else 0.0,
+            'std_travel_time': self.vehicles.std,
+            'throughput': departed / self.step if self.step > 0 else 0.0,
+            'junction_waiting_time': {tl_id: controller.total_waiting_time
+                                      for tl_id, controller in self.controllers.items()},
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pengendali per persimpangan untuk jaringan banyak lampu")
+    parser.add_argument('--controller', default='csp', choices=list(CONTROLLERS))
+    parser.add_argument('--config', default='intersection.sumocfg', help="File .sumocfg jaringan")
+    parser.add_argument('--tl-ids', nargs='+', default=None, help="ID lampu yang dikendalikan (default: semua)")
+    parser.add_argument('--steps', type=int, default=500)
+    parser.add_argument('--backend', default='traci', choices=SumoEnv.backends)
+    parser.add_argument('--gui', action='store_true')
+    parser.add_argument('--log-dir', default='.')
+    parser.add_argument('--verbosity', type=int, default=2, choices=[0, 1, 2],
+                        help="0 = senyap, 1 = ringkasan akhir, 2 = rincian per siklus")
+    args = parser.parse_args()
+
+    env = SumoEnv(label='multi_csp', gui_f=args.gui, backend=args.backend, config_file=args.config,
+                  tl_ids=args.tl_ids or 'all', sumo_args=sumo_console_args(args.verbosity),
+                  per_vehicle=args.controller == 'csp') # Actuated hanya membaca agregat jalur
+    multi = MultiJunctionCSP(env, log_dir=args.log_dir, max_simulation_steps=args.steps, verbosity=args.verbosity,
+                             controller=args.controller)
+    summary = multi.run()
+
+    print(f"\n--- Ringkasan Simulasi ({len(multi.controllers)} persimpangan) ---")
+    print(f"Simulasi berakhir pada langkah {summary['steps']}. Total kendaraan berangkat: {summary['vehicles_departed']}")
+    print(f"Waktu tunggu rata-rata per kendaraan: {summary['avg_waiting_time']:.2f}s, "
+          f"Waktu tempuh rata-rata per kendaraan: {summary['avg_travel_time']:.2f}s")
+    for tl_id, waiting_time in summary['junction_waiting_time'].items():
+        print(f"  {tl_id}: total waktu tunggu {waiting_time:.2f}s")
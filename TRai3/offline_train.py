@@ -0,0 +1,69 @@
+import argparse
+import os
+import numpy as np
+
+from q_table import ACTIONS, STATE_SHAPE, QTable
+from replay_buffer import load_transitions
+
+
+def offline_train(q_table, transitions, sweeps=100, batch_size=None, learning_rate=0.1, discount_factor=0.9,
+                  seed=None, verbose=True):
+    """
+    Q-learning batch tanpa SUMO atas transisi dari replay buffer. Setiap sweep mengacak urutan
+    transisi dan memperbarui tabel per batch (batch_size=None berarti seluruh buffer sekaligus);
+    galat TD pasangan (s, a) yang sama dalam satu batch dirata-rata. Mengembalikan rata-rata
+    |galat TD| per sweep sebagai ukuran konvergensi.
+    """
+    rng = np.random.default_rng(seed)
+    states = q_table.encode(np.asarray(transitions['state'], dtype=np.intp))
+    actions = np.asarray(transitions['action'], dtype=np.intp)
+    rewards = np.asarray(transitions['reward'], dtype=np.float64)
+    next_states = q_table.encode(np.asarray(transitions['next_state'], dtype=np.intp))
+    n = len(actions)
+    batch_size = batch_size or n
+
+    history = []
+    for sweep in range(1, sweeps + 1):
+        order = rng.permutation(n)
+        abs_error = 0.0
+        for start in range(0, n, batch_size):
+            batch = order[start:start + batch_size]
+            error = q_table.update(states[batch], actions[batch], rewards[batch], next_states[batch],
+                                   learning_rate, discount_factor, average=True)
+            abs_error += np.abs(error).sum()
+        history.append(abs_error / n)
+        if verbose and (sweep == 1 or sweep % 10 == 0 or sweep == sweeps):
+            print(f"Sweep {sweep}/{sweeps}: rata-rata |galat TD| {history[-1]:.4f}")
+    return history
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Pelatihan tabel-Q CSP+RL secara offline dari file replay (tanpa menjalankan SUMO)")
+    parser.add_argument('--replay', nargs='+', required=True, help="File replay dari --replay-file")
+    parser.add_argument('--checkpoint', default='q_table.npz',
+                        help="Checkpoint tabel-Q; dimuat jika ada (warm start), lalu ditimpa")
+    parser.add_argument('--sweeps', type=int, default=100)
+    parser.add_argument('--batch-size', type=int, default=None, help="Default: seluruh buffer per batch")
+    parser.add_argument('--learning-rate', type=float, default=0.1)
+    parser.add_argument('--discount', type=float, default=0.9)
+    parser.add_argument('--epsilon', type=float, default=None,
+                        help="Epsilon yang disimpan ke checkpoint (default: dari checkpoint, atau 1.0)")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    transitions = load_transitions(args.replay, len(STATE_SHAPE))
+    if len(transitions) == 0:
+        parser.error("file replay tidak berisi transisi")
+    q_table = QTable(STATE_SHAPE, len(ACTIONS))
+    exploration_rate = 1.0
+    if os.path.exists(args.checkpoint):
+        exploration_rate = float(q_table.load(args.checkpoint)['exploration_rate'])
+        print(f"Melanjutkan dari checkpoint {args.checkpoint}")
+    if args.epsilon is not None:
+        exploration_rate = args.epsilon
+
+    print(f"{len(transitions)} transisi dari {len(args.replay)} file replay")
+    offline_train(q_table, transitions, args.sweeps, args.batch_size, args.learning_rate, args.discount, args.seed)
+    q_table.save(args.checkpoint, exploration_rate=exploration_rate)
+    print(f"{q_table.visited_states()} keadaan terkunjungi; checkpoint disimpan ke {args.checkpoint}")
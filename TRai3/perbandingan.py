@@ -1,145 +1,146 @@
-import pandas as pd
+import argparse
+import os
+import matplotlib
+matplotlib.use('Agg') # Hanya menulis PNG, tanpa jendela
 import matplotlib.pyplot as plt
 import numpy as np
 
-# --- 1. Load Data dari File Log ---
-try:
-    # Load data untuk sistem Adaptif (CSP)
-    df_adaptive = pd.read_csv('queue_length.txt')
-    # Rename columns for clarity and consistency if needed for plotting
-    df_adaptive.rename(columns={
-        'total_halting_vehicles': 'halting_vehicles',
-        'ns_avg_wait_current': 'ns_avg_waiting_time',
-        'ew_avg_wait_current': 'ew_avg_waiting_time'
-    }, inplace=True)
-
-    # Load data untuk sistem Statis
-    df_static = pd.read_csv('static_queue_length.txt')
-    # Rename columns for clarity and consistency if needed for plotting
-    df_static.rename(columns={
-        'queue_length': 'halting_vehicles', # Use a common name for plotting
-    }, inplace=True)
-
-except FileNotFoundError:
-    print("Error: Pastikan file 'queue_length.txt' dan 'static_queue_length.txt' berada di direktori yang sama.")
-    exit()
-
-# --- 2. Siapkan Data Ringkasan (dari output konsol sebelumnya) ---
-# Data Ringkasan untuk CSP Adaptif
-csp_summary = {
-    "Total vehicles departed": 1158,
-    "Average waiting time per vehicle": 533.90,
-    "Average travel time per vehicle": 50.71,
-    "Throughput": 1.1580,
-}
+from results_store import ResultsStore
 
-# Data Ringkasan untuk Statis
-static_summary = {
-    "Total vehicles departed": 1132,
-    "Average waiting time per vehicle": 544.92,
-    "Average travel time per vehicle": 53.56,
-    "Throughput": 1.1320,
-}
+# Label dan warna per pengendali; pengendali lain memakai nama kuncinya
+LABELS = {'csp': 'CSP Adaptif', 'static': 'Statis', 'actuated': 'Actuated'}
+COLORS = {'csp': 'blue', 'static': 'red', 'actuated': 'green'}
 
-# --- 3. Buat Grafik Perbandingan Time Series ---
-plt.figure(figsize=(15, 10))
-
-# Plot Kepadatan Antrean (Halting Vehicles)
-plt.subplot(2, 1, 1) # 2 baris, 1 kolom, plot ke-1
-plt.plot(df_adaptive['step'], df_adaptive['halting_vehicles'], label='CSP Adaptif', color='blue', alpha=0.7)
-plt.plot(df_static['step'], df_static['halting_vehicles'], label='Statis', color='red', alpha=0.7, linestyle='--')
-plt.title('Perbandingan Kepadatan Antrean (Halting Vehicles) Seiring Waktu')
-plt.xlabel('Langkah Simulasi')
-plt.ylabel('Jumlah Kendaraan Berhenti')
-plt.legend()
-plt.grid(True, linestyle=':', alpha=0.6)
-plt.ylim(bottom=0) # Pastikan Y-axis mulai dari 0
-
-# Plot Waktu Tunggu Kumulatif (per langkah)
-plt.subplot(2, 1, 2) # 2 baris, 1 kolom, plot ke-2
-plt.plot(df_adaptive['step'], df_adaptive['total_waiting_time_step'], label='CSP Adaptif', color='blue', alpha=0.7)
-plt.plot(df_static['step'], df_static['waiting_time'], label='Statis', color='red', alpha=0.7, linestyle='--') # static log uses 'waiting_time'
-plt.title('Perbandingan Total Waktu Tunggu per Langkah')
-plt.xlabel('Langkah Simulasi')
-plt.ylabel('Total Waktu Tunggu (detik) per Langkah')
-plt.legend()
-plt.grid(True, linestyle=':', alpha=0.6)
-plt.ylim(bottom=0)
-
-# Menyimpan grafik ke path yang diinginkan
-plt.tight_layout()
-plt.savefig(r'C:\Users\LENOVO\AppData\Local\Programs\Python\Python311\Project\TRai3_Latest\TRai3\output_comparison_1.png')
-
-# --- 4. Buat Grafik Perbandingan Bar Chart untuk Metrik Kunci ---
-metrics = {
-    'Total Kendaraan Berangkat': (csp_summary['Total vehicles departed'], static_summary['Total vehicles departed']),
-    'Waktu Tunggu Rata-Rata per Kendaraan': (csp_summary['Average waiting time per vehicle'], static_summary['Average waiting time per vehicle']),
-    'Waktu Perjalanan Rata-Rata per Kendaraan': (csp_summary['Average travel time per vehicle'], static_summary['Average travel time per vehicle']),
-    'Throughput (kendaraan/langkah)': (csp_summary['Throughput'], static_summary['Throughput']),
+# Metrik ringkasan yang dibandingkan: field ringkasan run -> label grafik
+SUMMARY_METRICS = {
+    'vehicles_departed': 'Total Kendaraan Berangkat',
+    'avg_waiting_time': 'Waktu Tunggu Rata-Rata per Kendaraan',
+    'avg_travel_time': 'Waktu Perjalanan Rata-Rata per Kendaraan',
+    'throughput': 'Throughput (kendaraan/langkah)',
 }
 
-metric_names = list(metrics.keys())
-csp_values = [metrics[name][0] for name in metric_names]
-static_values = [metrics[name][1] for name in metric_names]
-
-x = np.arange(len(metric_names)) # Posisi label di x-axis
-width = 0.35 # Lebar bar
-
-fig, ax = plt.subplots(figsize=(12, 7))
-rects1 = ax.bar(x - width/2, csp_values, width, label='CSP Adaptif', color='skyblue')
-rects2 = ax.bar(x + width/2, static_values, width, label='Statis', color='lightcoral')
-
-# Fungsi untuk menambahkan nilai di atas bar
-def autolabel(rects):
-    for rect in rects:
-        height = rect.get_height()
-        ax.annotate(f'{height:.2f}',
-                    xy=(rect.get_x() + rect.get_width() / 2, height),
-                    xytext=(0, 3),  # 3 points vertical offset
-                    textcoords="offset points",
-                    ha='center', va='bottom')
-
-autolabel(rects1)
-autolabel(rects2)
-
-ax.set_ylabel('Nilai Metrik')
-ax.set_title('Perbandingan Metrik Performa Utama')
-ax.set_xticks(x)
-ax.set_xticklabels(metric_names, rotation=20, ha='right')
-ax.legend()
-ax.grid(axis='y', linestyle=':', alpha=0.7)
-
-# Menyimpan grafik ke path yang diinginkan
-plt.tight_layout()
-plt.savefig(r'C:\Users\LENOVO\AppData\Local\Programs\Python\Python311\Project\TRai3_Latest\TRai3\output_comparison_2.png')
-
-# --- 5. Buat Grafik Perbandingan Waktu Tunggu Spesifik Jalur (Time Series) ---
-plt.figure(figsize=(15, 10))
-
-# Waktu Tunggu NS
-plt.subplot(2, 1, 1)
-plt.plot(df_adaptive['step'], df_adaptive['ns_avg_waiting_time'], label='CSP Adaptif NS', color='blue', alpha=0.7)
-plt.plot(df_static['step'], df_static['ns_avg_waiting_time'], label='Statis NS', color='skyblue', linestyle='--')
-plt.title('Perbandingan Rata-rata Waktu Tunggu NS per Langkah')
-plt.xlabel('Langkah Simulasi')
-plt.ylabel('Waktu Tunggu Rata-rata (detik)')
-plt.legend()
-plt.grid(True, linestyle=':', alpha=0.6)
-plt.ylim(bottom=0)
-
-# Waktu Tunggu EW
-plt.subplot(2, 1, 2)
-plt.plot(df_adaptive['step'], df_adaptive['ew_avg_waiting_time'], label='CSP Adaptif EW', color='red', alpha=0.7)
-plt.plot(df_static['step'], df_static['ew_avg_waiting_time'], label='Statis EW', color='lightcoral', linestyle='--')
-plt.title('Perbandingan Rata-rata Waktu Tunggu EW per Langkah')
-plt.xlabel('Langkah Simulasi')
-plt.ylabel('Waktu Tunggu Rata-rata (detik)')
-plt.legend()
-plt.grid(True, linestyle=':', alpha=0.6)
-plt.ylim(bottom=0)
-
-# Menyimpan grafik ke path yang diinginkan
-plt.tight_layout()
-plt.savefig(r'C:\Users\LENOVO\AppData\Local\Programs\Python\Python311\Project\TRai3_Latest\TRai3\output_comparison_3.png')
-
-print("\nGrafik perbandingan telah dibuat dan disimpan.")
+# Nilai kritis t dua sisi 95% untuk derajat kebebasan 1..30; di atasnya dipakai pendekatan normal
+_T_95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+         2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+         2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+
+def mean_ci(values, axis=0):
+    """
+    Rata-rata dan setengah lebar interval kepercayaan 95% (distribusi t) sepanjang axis.
+    Dengan satu run setengah lebarnya 0.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = values.shape[axis]
+    mean = values.mean(axis=axis)
+    if n < 2:
+        return mean, np.zeros_like(mean)
+    t = _T_95[n - 2] if n - 1 <= len(_T_95) else 1.960
+    return mean, t * values.std(axis=axis, ddof=1) / np.sqrt(n)
+
+
+def compare(store, controllers, scenario):
+    """
+    Mengumpulkan ringkasan (rata-rata dan CI 95% per metrik) per pengendali untuk satu skenario.
+    Mengembalikan dict pengendali -> {'keys': kunci run, 'n': jumlah run, metrik: (rata-rata, ci)}.
+    """
+    results = {}
+    for controller in controllers:
+        keys = store.runs(controller=controller, scenario=scenario)
+        if not keys:
+            continue
+        summaries = store.summaries(keys, SUMMARY_METRICS)
+        results[controller] = {'keys': keys, 'n': len(keys)}
+        results[controller].update({field: mean_ci(values) for field, values in summaries.items()})
+    return results
+
+
+def print_comparison(results, scenario):
+    print(f"Skenario {scenario}: rata-rata ± CI 95%")
+    print(f"{'pengendali':<12} {'run':>5} " + ' '.join(f"{field:>22}" for field in SUMMARY_METRICS))
+    for controller, data in results.items():
+        cells = ' '.join(f"{f'{data[field][0]:.2f} ± {data[field][1]:.2f}':>22}" for field in SUMMARY_METRICS)
+        print(f"{controller:<12} {data['n']:>5} {cells}")
+
+
+def plot_series(ax, store, results, column, title, ylabel):
+    """Deret per langkah: rata-rata antar run dengan pita CI 95%."""
+    for controller, data in results.items():
+        steps, series = store.stacked_steps(data['keys'], column)
+        mean, ci = mean_ci(series)
+        color = COLORS.get(controller)
+        ax.plot(steps, mean, label=f"{LABELS.get(controller, controller)} (n={data['n']})", color=color, alpha=0.8)
+        ax.fill_between(steps, mean - ci, mean + ci, color=color, alpha=0.2)
+    ax.set_title(title)
+    ax.set_xlabel('Langkah Simulasi')
+    ax.set_ylabel(ylabel)
+    ax.legend()
+    ax.grid(True, linestyle=':', alpha=0.6)
+    ax.set_ylim(bottom=0) # Pastikan Y-axis mulai dari 0
+
+
+def plot_comparison(store, results, output_dir='.'):
+    """Menulis tiga grafik perbandingan (output_comparison_1..3.png) ke output_dir."""
+    os.makedirs(output_dir, exist_ok=True)
+
+    # --- 1. Kepadatan antrean dan total waktu tunggu per langkah ---
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(15, 10))
+    plot_series(ax1, store, results, 'halting_vehicles',
+                'Perbandingan Kepadatan Antrean (Halting Vehicles) Seiring Waktu', 'Jumlah Kendaraan Berhenti')
+    plot_series(ax2, store, results, 'waiting_time',
+                'Perbandingan Total Waktu Tunggu per Langkah', 'Total Waktu Tunggu (detik) per Langkah')
+    fig.tight_layout()
+    fig.savefig(os.path.join(output_dir, 'output_comparison_1.png'))
+    plt.close(fig)
+
+    # --- 2. Metrik ringkasan dengan error bar CI 95% ---
+    fig, ax = plt.subplots(figsize=(12, 7))
+    x = np.arange(len(SUMMARY_METRICS)) # Posisi label di x-axis
+    width = 0.8 / max(len(results), 1) # Lebar bar
+    for i, (controller, data) in enumerate(results.items()):
+        means = [data[field][0] for field in SUMMARY_METRICS]
+        cis = [data[field][1] for field in SUMMARY_METRICS]
+        rects = ax.bar(x + (i - (len(results) - 1) / 2) * width, means, width, yerr=cis, capsize=4,
+                       label=f"{LABELS.get(controller, controller)} (n={data['n']})", color=COLORS.get(controller),
+                       alpha=0.6)
+        ax.bar_label(rects, fmt='%.2f', padding=3)
+    ax.set_ylabel('Nilai Metrik')
+    ax.set_title('Perbandingan Metrik Performa Utama (rata-rata ± CI 95%)')
+    ax.set_xticks(x)
+    ax.set_xticklabels(list(SUMMARY_METRICS.values()), rotation=20, ha='right')
+    ax.legend()
+    ax.grid(axis='y', linestyle=':', alpha=0.7)
+    fig.tight_layout()
+    fig.savefig(os.path.join(output_dir, 'output_comparison_2.png'))
+    plt.close(fig)
+
+    # --- 3. Waktu tunggu rata-rata per arah ---
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(15, 10))
+    plot_series(ax1, store, results, 'ns_avg_waiting_time',
+                'Perbandingan Rata-rata Waktu Tunggu NS per Langkah', 'Waktu Tunggu Rata-rata (detik)')
+    plot_series(ax2, store, results, 'ew_avg_waiting_time',
+                'Perbandingan Rata-rata Waktu Tunggu EW per Langkah', 'Waktu Tunggu Rata-rata (detik)')
+    fig.tight_layout()
+    fig.savefig(os.path.join(output_dir, 'output_comparison_3.png'))
+    plt.close(fig)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Membandingkan pengendali dari ResultsStore (hasil experiment.py atau --store) dengan CI 95% antar seed")
+    parser.add_argument('--store-dir', default=os.path.join('experiments', 'store'))
+    parser.add_argument('--scenario', default='intersection', help="Nama skenario (file rute tanpa ekstensi)")
+    parser.add_argument('--controllers', nargs='+', default=list(LABELS))
+    parser.add_argument('--output-dir', default='.', help="Direktori grafik PNG")
+    parser.add_argument('--no-plots', action='store_true', help="Hanya cetak tabel ringkasan")
+    args = parser.parse_args()
+
+    store = ResultsStore(args.store_dir)
+    results = compare(store, args.controllers, args.scenario)
+    if not results:
+        parser.error(f"Tidak ada run untuk skenario {args.scenario!r} di {args.store_dir}; jalankan experiment.py "
+                     f"atau statis.py/traffic_light_csp.py/actuated.py dengan --seed dan --store")
+    print_comparison(results, args.scenario)
+    if not args.no_plots:
+        plot_comparison(store, results, args.output_dir)
+        print("\nGrafik perbandingan telah dibuat dan disimpan.")
@@ -0,0 +1,104 @@
+import numpy as np
+
+# Tindakan RL TrafficLightCSP: Penyesuaian waktu hijau target (penyesuaian NS, penyesuaian EW) dalam detik
+# Penyesuaian ini akan diterapkan pada waktu hijau berbasis permintaan sebelum CSP
+ACTIONS = [
+    (0, 0),    # Tidak ada perubahan
+    (5, 0),    # Tingkatkan hijau NS sebesar 5 detik
+    (-5, 0),   # Kurangi hijau NS sebesar 5 detik
+    (0, 5),    # Tingkatkan hijau EW sebesar 5 detik
+    (0, -5),   # Kurangi hijau EW sebesar 5 detik
+    (5, 5),    # Tingkatkan keduanya sebesar 5 detik
+    (-5, -5),  # Kurangi keduanya sebesar 5 detik
+    (5, -5),   # Tingkatkan NS, Kurangi EW sebesar 5 detik
+    (-5, 5)    # Kurangi NS, Tingkatkan EW sebesar 5 detik
+]
+# Jumlah bin tiap komponen keadaan dari TrafficLightCSP._get_state (antrian NS/EW, waktu tunggu NS/EW)
+STATE_SHAPE = (4, 4, 4, 4)
+
+
+class QTable:
+    """
+    Tabel-Q padat: satu array float kontigu berbentuk (jumlah_keadaan, jumlah_tindakan).
+
+    Keadaan diskrit (tuple bin, mis. dari TrafficLightCSP._get_state) dikodekan menjadi indeks
+    baris bilangan bulat (urutan row-major atas state_shape). Semua metode menerima satu keadaan
+    (tuple atau int) maupun batch keadaan (array (N, len(state_shape)) atau array indeks (N,)),
+    sehingga banyak agen/lingkungan dapat berbagi dan memperbarui tabel yang sama secara murah.
+    """
+    def __init__(self, state_shape, num_actions):
+        self.state_shape = tuple(state_shape)
+        self.num_actions = num_actions
+        self.num_states = int(np.prod(self.state_shape))
+        self.values = np.zeros((self.num_states, num_actions))
+        # Pengali per komponen untuk pengkodean row-major tanpa memanggil NumPy per langkah
+        self._strides = [int(np.prod(self.state_shape[i + 1:])) for i in range(len(self.state_shape))]
+
+    def encode(self, states):
+        """Tuple keadaan -> indeks int; batch (N, d) -> array indeks (N,). Indeks int dikembalikan apa adanya."""
+        if isinstance(states, tuple):
+            return sum(s * stride for s, stride in zip(states, self._strides))
+        states = np.asarray(states)
+        if states.ndim == 2:
+            return np.ravel_multi_index(states.T, self.state_shape)
+        return states
+
+    def decode(self, index):
+        """Indeks (atau array indeks) -> tuple bin keadaan."""
+        return np.unravel_index(index, self.state_shape)
+
+    def __getitem__(self, state):
+        # Baris nilai-Q (view) untuk satu keadaan atau batch keadaan
+        return self.values[self.encode(state)]
+
+    def best_action(self, states):
+        """Indeks tindakan dengan nilai-Q tertinggi (argmax) untuk satu keadaan atau batch."""
+        return np.argmax(self.values[self.encode(states)], axis=-1)
+
+    def max_value(self, states):
+        """Nilai-Q maksimum untuk satu keadaan atau batch."""
+        return np.max(self.values[self.encode(states)], axis=-1)
+
+    def update(self, states, actions, rewards, next_states, learning_rate, discount_factor, average=False):
+        """
+        Pembaruan Q-learning untuk satu transisi atau batch transisi:
+        Q(s, a) += alpha * [reward + gamma * max(Q(s', a')) - Q(s, a)]
+
+        Dalam satu batch semua target dihitung dari tabel sebelum pembaruan, dan transisi dengan
+        pasangan (s, a) yang sama diakumulasi (np.add.at), bukan saling menimpa. Dengan average=True
+        galat TD pasangan yang sama dirata-rata, sehingga langkahnya tetap alpha berapa pun jumlah
+        duplikatnya (untuk batch besar dari replay buffer). Mengembalikan galat TD per transisi.
+        """
+        rows = self.encode(states)
+        target = rewards + discount_factor * self.max_value(next_states)
+        error = target - self.values[rows, actions]
+        if np.ndim(rows) == 0:
+            self.values[rows, actions] += learning_rate * error
+        elif average:
+            flat = rows * self.num_actions + actions
+            sums = np.bincount(flat, weights=error, minlength=self.values.size)
+            counts = np.bincount(flat, minlength=self.values.size)
+            touched = counts > 0
+            self.values.reshape(-1)[touched] += learning_rate * sums[touched] / counts[touched]
+        else:
+            np.add.at(self.values, (rows, actions), learning_rate * error)
+        return error
+
+    def visited_states(self):
+        """Jumlah keadaan yang memiliki setidaknya satu nilai-Q bukan nol."""
+        return int(np.count_nonzero(self.values.any(axis=1)))
+
+    def save(self, path, **extra):
+        # Disimpan berbentuk state_shape + (num_actions,) sehingga dapat diindeks langsung dengan tuple keadaan
+        np.savez(path, q_values=self.values.reshape(self.state_shape + (self.num_actions,)), **extra)
+
+    def load(self, path):
+        """Memuat nilai-Q dari file .npz dan mengembalikan entri lain (mis. epsilon) sebagai dict."""
+        with np.load(path) as data:
+            q_values = data['q_values']
+            extra = {name: data[name] for name in data.files if name != 'q_values'}
+        if q_values.shape != self.state_shape + (self.num_actions,):
+            raise ValueError(f"Bentuk tabel-Q pada checkpoint {q_values.shape} tidak cocok dengan "
+                             f"{self.state_shape + (self.num_actions,)}")
+        self.values[:] = q_values.reshape(self.values.shape)
+        return extra
@@ -0,0 +1,63 @@
+import os
+import numpy as np
+
+
+def transition_dtype(state_size):
+    """
+    Tipe rekaman satu transisi (keadaan, tindakan, hadiah, keadaan berikutnya): bin keadaan dan
+    indeks tindakan sebagai uint8, hadiah float32. Tanpa padding, jadi 13 byte untuk 4 komponen keadaan.
+    """
+    return np.dtype([('state', np.uint8, (state_size,)), ('action', np.uint8), ('reward', np.float32),
+                     ('next_state', np.uint8, (state_size,))])
+
+
+class ReplayBuffer:
+    """
+    Buffer pengalaman append-only di disk: file biner berisi rekaman transition_dtype berurutan,
+    tanpa header. Setiap append() membuka file dalam mode 'ab' dan menulis satu rekaman, sehingga
+    transisi dari run yang terhenti tetap tersimpan dan banyak run dapat menambah file yang sama
+    secara bergantian. Satu transisi per siklus lampu, jadi biaya I/O dapat diabaikan.
+    """
+    def __init__(self, path, state_size):
+        self.path = path
+        self.dtype = transition_dtype(state_size)
+        self._record = np.zeros(1, dtype=self.dtype)
+
+    def append(self, state, action, reward, next_state):
+        record = self._record
+        record['state'] = state
+        record['action'] = action
+        record['reward'] = reward
+        record['next_state'] = next_state
+        with open(self.path, 'ab') as f:
+            record.tofile(f)
+
+    def __len__(self):
+        if not os.path.exists(self.path):
+            return 0
+        return os.path.getsize(self.path) // self.dtype.itemsize
+
+    def load(self):
+        """Semua transisi sebagai array terstruktur (memmap baca-saja untuk file yang tidak kosong)."""
+        return load_transitions(self.path, self.dtype['state'].shape[0])
+
+
+def load_transitions(paths, state_size):
+    """
+    Membaca satu atau beberapa file replay menjadi array terstruktur transition_dtype(state_size).
+    Satu file dibaca sebagai memmap; beberapa file digabungkan ke memori.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    dtype = transition_dtype(state_size)
+    parts = []
+    for path in paths:
+        size = os.path.getsize(path)
+        if size % dtype.itemsize:
+            raise ValueError(f"Ukuran file replay {path} ({size} byte) bukan kelipatan rekaman "
+                             f"{dtype.itemsize} byte; state_size salah atau file terpotong")
+        if size:
+            parts.append(np.memmap(path, dtype=dtype, mode='r'))
+    if not parts:
+        return np.empty(0, dtype=dtype)
+    return parts[0] if len(parts) == 1 else np.concatenate(parts)
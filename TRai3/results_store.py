@@ -0,0 +1,167 @@
+import glob
+import json
+import os
+import zipfile
+import numpy as np
+
+from step_logger import read_log
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError: # Parquet opsional; tanpa pyarrow dipakai NPZ tak terkompresi
+    pa = pq = None
+
+# Nama kolom log per langkah -> nama seragam di store, agar CSP dan statis dapat dibandingkan langsung
+STEP_ALIASES = {
+    'total_halting_vehicles': 'halting_vehicles',
+    'queue_length': 'halting_vehicles',
+    'total_waiting_time_step': 'waiting_time',
+    'ns_avg_wait_current': 'ns_avg_waiting_time',
+    'ew_avg_wait_current': 'ew_avg_waiting_time',
+}
+
+FORMATS = ('parquet', 'npz')
+_SUMMARY_KEY = '__summary__'
+# File rute bawaan intersection.sumocfg, untuk run tanpa file rute pengganti
+DEFAULT_ROUTE_FILE = 'intersection.rou.xml'
+
+
+def scenario_name(route_file):
+    """Nama skenario dari file rute: 'intersection_low.rou.xml' -> 'intersection_low'."""
+    return os.path.basename(route_file).split('.')[0]
+
+
+def store_run(root, controller, route_file, seed, log_file, summary):
+    """
+    Menulis satu run yang sudah selesai ke ResultsStore di root: deret per langkah dibaca dari
+    log_file (format step_logger) dan skenario dari route_file (None = rute bawaan).
+    Ringkasan perkiraan (fast-forward, lihat Controller) ditolak.
+    """
+    if summary.get('approximate'):
+        raise ValueError("Ringkasan fast-forward (sample_interval > 1) hanya perkiraan dan tidak disimpan")
+    scenario = scenario_name(route_file or DEFAULT_ROUTE_FILE)
+    return ResultsStore(root).write_run(controller, scenario, seed, read_log(log_file), summary)
+
+
+def _npz_member_memmap(path, name):
+    """
+    Memmap baca-saja satu anggota NPZ tak terkompresi (np.savez), tanpa membaca anggota lain.
+    Anggota terkompresi atau berisi objek dimuat biasa.
+    """
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(name + '.npy')
+        if info.compress_type != zipfile.ZIP_STORED:
+            with archive.open(info) as f:
+                return np.lib.format.read_array(f)
+    with open(path, 'rb') as f:
+        # Header lokal ZIP: 30 byte tetap + nama file + extra field, lalu data .npy
+        f.seek(info.header_offset + 26)
+        name_length, extra_length = np.frombuffer(f.read(4), dtype='<u2')
+        f.seek(info.header_offset + 30 + int(name_length) + int(extra_length))
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    if dtype.hasobject:
+        raise ValueError(f"Kolom {name!r} di {path} berisi objek dan tidak dapat di-memmap")
+    if shape == () or 0 in shape:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape,
+                     order='F' if fortran_order else 'C')
+
+
+class ResultsStore:
+    """
+    Penyimpanan hasil run berbasis direktori: satu file kolomnar per run, berkunci
+    (controller, scenario, seed), berisi deret per langkah (satu kolom per metrik) dan ringkasan run.
+
+    Format 'parquet' (butuh pyarrow) menyimpan ringkasan sebagai metadata skema; format 'npz'
+    (NumPy saja) menyimpannya sebagai string JSON di anggota __summary__. Keduanya dibaca per
+    kolom dan di-memory-map, sehingga perbandingan ratusan run hanya membaca kolom yang diperlukan.
+    """
+    def __init__(self, root, fmt=None):
+        if fmt is None:
+            fmt = 'parquet' if pq is not None else 'npz'
+        if fmt not in FORMATS:
+            raise ValueError(f"Format store tidak dikenal: {fmt!r}")
+        if fmt == 'parquet' and pq is None:
+            raise ImportError("Format 'parquet' membutuhkan pyarrow")
+        self.root = root
+        self.fmt = fmt
+
+    def path(self, controller, scenario, seed, fmt=None):
+        return os.path.join(self.root, f"{controller}__{scenario}__seed{seed}.{fmt or self.fmt}")
+
+    def write_run(self, controller, scenario, seed, steps, summary):
+        """
+        Menulis satu run. steps: dict nama kolom -> array (mis. hasil step_logger.read_log);
+        nama kolom dipetakan lewat STEP_ALIASES. summary: dict ringkasan dari run().
+        """
+        os.makedirs(self.root, exist_ok=True)
+        columns = {STEP_ALIASES.get(name, name): np.asarray(values) for name, values in steps.items()}
+        summary = dict(summary, controller=controller, scenario=scenario, seed=seed)
+        path = self.path(controller, scenario, seed)
+        # Ditulis ke file sementara lalu diganti, agar pembaca tidak pernah melihat file setengah jadi
+        tmp_path = path + '.tmp'
+        if self.fmt == 'parquet':
+            table = pa.table(columns).replace_schema_metadata({_SUMMARY_KEY: json.dumps(summary, default=float)})
+            pq.write_table(table, tmp_path)
+        else:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **columns, **{_SUMMARY_KEY: np.array(json.dumps(summary, default=float))})
+        os.replace(tmp_path, path)
+        return path
+
+    def runs(self, controller=None, scenario=None, seed=None):
+        """Daftar kunci (controller, scenario, seed) yang ada di store, dengan filter opsional."""
+        keys = set()
+        for path in glob.glob(os.path.join(glob.escape(self.root), '*__*__seed*.*')):
+            name, ext = os.path.splitext(os.path.basename(path))
+            if ext[1:] not in FORMATS:
+                continue
+            run_controller, run_scenario, run_seed = name.split('__')
+            key = (run_controller, run_scenario, int(run_seed[len('seed'):]))
+            if ((controller is None or key[0] == controller) and (scenario is None or key[1] == scenario)
+                    and (seed is None or key[2] == seed)):
+                keys.add(key)
+        return sorted(keys)
+
+    def _existing_path(self, key):
+        for fmt in (self.fmt,) + FORMATS:
+            path = self.path(*key, fmt=fmt)
+            if os.path.exists(path):
+                return path, fmt
+        raise FileNotFoundError(f"Run {key} tidak ada di {self.root}")
+
+    def load_summary(self, key):
+        path, fmt = self._existing_path(key)
+        if fmt == 'parquet':
+            return json.loads(pq.read_schema(path).metadata[_SUMMARY_KEY.encode()])
+        with np.load(path) as data:
+            return json.loads(str(data[_SUMMARY_KEY]))
+
+    def load_steps(self, key, columns):
+        """Kolom per langkah satu run sebagai dict nama -> array (memmap bila memungkinkan)."""
+        path, fmt = self._existing_path(key)
+        if fmt == 'parquet':
+            table = pq.read_table(path, columns=list(columns), memory_map=True)
+            return {name: table.column(name).to_numpy() for name in columns}
+        return {name: _npz_member_memmap(path, name) for name in columns}
+
+    def summaries(self, keys, fields):
+        """Ringkasan banyak run sebagai dict field -> array (satu elemen per kunci, urutan keys)."""
+        loaded = [self.load_summary(key) for key in keys]
+        return {field: np.array([summary[field] for summary in loaded], dtype=np.float64) for field in fields}
+
+    def stacked_steps(self, keys, column):
+        """
+        Satu kolom per langkah dari banyak run sebagai array (jumlah_run, langkah), dipotong ke
+        run terpendek, beserta kolom 'step' run pertama.
+        """
+        series = [self.load_steps(key, ['step', column]) for key in keys]
+        length = min(len(data['step']) for data in series)
+        return (np.asarray(series[0]['step'][:length]),
+                np.stack([np.asarray(data[column][:length], dtype=np.float64) for data in series]))
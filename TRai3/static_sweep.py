@@ -0,0 +1,166 @@
+import argparse
+import csv
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+from sumoenv import SumoEnv
+from statis import TrafficLightStatic
+
+SWEEP_FIELDS = ['green_ns', 'green_ew', 'yellow_time', 'cycle_length', 'steps', 'vehicles_departed',
+                'avg_waiting_time', 'avg_travel_time', 'throughput', 'approximate', 'failed', 'pareto', 'wall_time']
+
+
+def plan_grid(green_ns, green_ew, yellow_times):
+    """Semua kombinasi (green_ns, green_ew, yellow_time) sebagai array (N, 3)."""
+    grid = np.meshgrid(green_ns, green_ew, yellow_times, indexing='ij')
+    return np.stack([axis.ravel() for axis in grid], axis=1)
+
+
+def pareto_front(waiting_time, throughput):
+    """
+    Mask Pareto untuk meminimalkan waktu tunggu dan memaksimalkan throughput: rencana i masuk
+    front jika tidak ada rencana j yang sama baik pada kedua metrik dan lebih baik pada salah satunya.
+    Dihitung sekaligus dengan matriks dominasi (N, N).
+    """
+    waiting_time = np.asarray(waiting_time, dtype=np.float64)
+    throughput = np.asarray(throughput, dtype=np.float64)
+    # dominates[j, i]: rencana j mendominasi rencana i
+    no_worse = (waiting_time[:, None] <= waiting_time[None, :]) & (throughput[:, None] >= throughput[None, :])
+    better = (waiting_time[:, None] < waiting_time[None, :]) | (throughput[:, None] > throughput[None, :])
+    return ~(no_worse & better).any(axis=0)
+
+
+def _make_env(label, route_file, seed, backend, state_file, output_prefix, warmup_steps=0):
+    # --output-prefix memisahkan output detektor antar worker yang berjalan paralel (seperti experiment.py)
+    return SumoEnv(label=label, gui_f=False, backend=backend, route_file=route_file, seed=seed,
+                   sumo_args=['--output-prefix', output_prefix, '--no-step-log', '--no-warnings'],
+                   reset_mode='state', warmup_steps=warmup_steps, state_file=state_file)
+
+
+def prepare_state(state_file, route_file=None, seed=None, warmup_steps=100, backend='traci'):
+    """
+    Menjalankan warm-up sekali dengan program lampu bawaan dan menyimpan state SUMO ke state_file.
+    State (termasuk RNG) ini menjadi titik awal bersama semua rencana dalam sweep. Output SUMO
+    warm-up ditulis ke direktori state_file.
+    """
+    if os.path.exists(state_file):
+        os.remove(state_file) # Selalu dibuat ulang, bukan state dari sweep sebelumnya
+    # Prefix berupa direktori state_file, sehingga state disimpan tepat di state_file
+    output_prefix = os.path.join(os.path.dirname(os.path.abspath(state_file)), '')
+    env = _make_env('sweep_warmup', route_file, seed, backend, state_file, output_prefix, warmup_steps)
+    try:
+        env.reset()
+    finally:
+        env.close()
+    return state_file
+
+
+def run_plan(green_ns, green_ew, yellow_time, state_file, route_file=None, seed=None, max_steps=500,
+             backend='traci', sample_interval=1, output_dir=None):
+    """
+    Satu rencana statis headless yang dimulai dari state bersama. Dipanggil di dalam proses worker.
+    Output SUMO (mis. detektor) ditulis ke output_dir (default: direktori state_file) dengan prefix per rencana.
+    Run yang gagal ditandai 'failed' (dengan 'error') dan metriknya adalah metrik sampai titik gagal.
+    """
+    label = f'sweep_{green_ns}_{green_ew}_{yellow_time}'
+    output_dir = output_dir or os.path.dirname(os.path.abspath(state_file))
+    env = _make_env(label, route_file, seed, backend, state_file, os.path.join(output_dir, label + '_'))
+    sim = TrafficLightStatic(env=env, log_file=os.devnull, max_simulation_steps=max_steps, verbosity=0,
+                             sample_interval=sample_interval, green_ns=green_ns, green_ew=green_ew,
+                             yellow_time=yellow_time)
+    row = {'green_ns': green_ns, 'green_ew': green_ew, 'yellow_time': yellow_time,
+           'cycle_length': green_ns + green_ew + 2 * yellow_time, 'failed': False}
+    start = time.perf_counter()
+    try:
+        summary = sim.run()
+    except Exception as e:
+        row.update(failed=True, error=f"{type(e).__name__}: {e}")
+        summary = sim.get_summary()
+    row.update({field: summary[field] for field in ('steps', 'vehicles_departed', 'avg_waiting_time',
+                                                    'avg_travel_time', 'throughput', 'approximate')})
+    row['wall_time'] = time.perf_counter() - start
+    return row
+
+
+def sweep(plans, route_file=None, seed=None, warmup_steps=100, max_steps=500, processes=None,
+          backend='traci', sample_interval=1, state_file=None):
+    """
+    Mengevaluasi semua rencana (array (N, 3) dari plan_grid) secara paralel dari satu state hasil
+    warm-up, lalu menandai front Pareto waktu tunggu vs throughput. Mengembalikan baris per
+    rencana dalam urutan plans, masing-masing dengan field 'pareto'. Rencana yang gagal atau
+    berhenti sebelum max_steps tidak ikut dinilai dan tidak pernah masuk front. Dengan
+    sample_interval > 1 metriknya hanya perkiraan ('approximate'), jadi tidak ada front.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        state_file = prepare_state(state_file or os.path.join(tmp_dir, 'sweep_state.xml'),
+                                   route_file, seed, warmup_steps, backend)
+        plans = [tuple(int(value) for value in plan) for plan in plans]
+        rows = {}
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = {pool.submit(run_plan, *plan, state_file, route_file, seed, max_steps, backend,
+                                   sample_interval, tmp_dir): plan
+                       for plan in plans}
+            for future in as_completed(futures):
+                plan = futures[future]
+                rows[plan] = future.result()
+                status = f"GAGAL ({rows[plan]['error']})" if rows[plan]['failed'] else 'Selesai'
+                print(f"{status}: NS={plan[0]} EW={plan[1]} kuning={plan[2]} ({rows[plan]['wall_time']:.1f}s)")
+    rows = [rows[plan] for plan in plans]
+    complete = [row for row in rows if not row['failed'] and row['steps'] >= max_steps]
+    if len(complete) < len(rows):
+        print(f"{len(rows) - len(complete)} rencana gagal atau berhenti sebelum {max_steps} langkah; "
+              f"tidak ikut front Pareto")
+    if sample_interval > 1:
+        print(f"sample_interval={sample_interval}: metrik fast-forward hanya perkiraan; front Pareto tidak dihitung")
+        complete = []
+    front = pareto_front([row['avg_waiting_time'] for row in complete], [row['throughput'] for row in complete])
+    for row in rows:
+        row['pareto'] = False
+    for row, on_front in zip(complete, front):
+        row['pareto'] = bool(on_front)
+    return rows
+
+
+def write_sweep(rows, path):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=SWEEP_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def print_front(rows):
+    front = sorted((row for row in rows if row['pareto']), key=lambda row: row['avg_waiting_time'])
+    print(f"\nFront Pareto ({len(front)} dari {len(rows)} rencana), urut waktu tunggu rata-rata:")
+    print(f"{'green_ns':>9} {'green_ew':>9} {'kuning':>7} {'siklus':>7} {'avg_wait':>10} {'throughput':>11}")
+    for row in front:
+        print(f"{row['green_ns']:>9} {row['green_ew']:>9} {row['yellow_time']:>7} {row['cycle_length']:>7} "
+              f"{row['avg_waiting_time']:>10.2f} {row['throughput']:>11.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Sweep paralel rencana lampu statis dari satu state warm-up bersama, dengan front Pareto")
+    parser.add_argument('--green-ns', nargs='+', type=int, default=[20, 30, 40, 50, 60])
+    parser.add_argument('--green-ew', nargs='+', type=int, default=[20, 30, 40, 50, 60])
+    parser.add_argument('--yellow-times', nargs='+', type=int, default=[3, 5])
+    parser.add_argument('--route-file', default=None, help="File rute pengganti (default: dari intersection.sumocfg)")
+    parser.add_argument('--seed', type=int, default=0, help="Seed SUMO (warm-up dan semua rencana)")
+    parser.add_argument('--warmup-steps', type=int, default=100)
+    parser.add_argument('--steps', type=int, default=500, help="Langkah simulasi per rencana setelah warm-up")
+    parser.add_argument('--processes', type=int, default=None, help="Jumlah proses worker (default: jumlah CPU)")
+    parser.add_argument('--backend', default='traci', choices=SumoEnv.backends)
+    parser.add_argument('--sample-interval', type=int, default=1,
+                        help="Langkah per pembacaan metrik; > 1 hanya perkiraan, tanpa front Pareto")
+    parser.add_argument('--output', default=os.path.join('experiments', 'static_sweep.csv'))
+    args = parser.parse_args()
+
+    plans = plan_grid(args.green_ns, args.green_ew, args.yellow_times)
+    rows = sweep(plans, args.route_file, args.seed, args.warmup_steps, args.steps, args.processes,
+                 args.backend, args.sample_interval)
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    write_sweep(rows, args.output)
+    print_front(rows)
+    print(f"\nSemua rencana disimpan ke {args.output}")
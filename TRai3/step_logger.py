@@ -0,0 +1,87 @@
+import os
+import numpy as np
+
+
+class StepLogger:
+    """
+    Logger per langkah simulasi. Baris ditampung di buffer NumPy yang sudah dialokasikan
+    dan ditulis ke file per blok (chunk), sehingga file tidak dibuka ulang di setiap langkah.
+
+    Format ditentukan dari ekstensi file: '.npz' menghasilkan file kolomnar biner
+    (satu array per kolom), selain itu CSV dengan format printf per kolom.
+    """
+    def __init__(self, path, columns, chunk_size=1024):
+        # columns: daftar pasangan (nama_kolom, format), mis. ('step', '%d')
+        self.path = path
+        self.names = [name for name, _ in columns]
+        self.chunk_size = chunk_size
+        self.binary = path.endswith('.npz')
+        self.rows = 0 # Jumlah baris yang sudah ditulis ke file
+        self._buffer = np.empty((chunk_size, len(columns)), dtype=np.float64)
+        self._n = 0
+
+        if self.binary:
+            # Blok biner ditulis ke file sementara lalu dikonversi ke NPZ saat close()
+            self._part_path = path + '.part'
+            self._file = open(self._part_path, 'wb')
+        else:
+            self._line_fmt = ','.join(fmt for _, fmt in columns) + '\n'
+            self._file = open(path, 'w')
+            self._file.write(','.join(self.names) + '\n')
+
+    def log(self, *values):
+        self._buffer[self._n] = values
+        self._n += 1
+        if self._n == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self._n == 0:
+            return
+        chunk = self._buffer[:self._n]
+        if self.binary:
+            chunk.tofile(self._file)
+        else:
+            self._file.write(''.join(self._line_fmt % tuple(row) for row in chunk.tolist()))
+        self._file.flush()
+        self.rows += self._n
+        self._n = 0
+
+    def close(self):
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+
+        if self.binary:
+            shape = (self.rows, len(self.names))
+            if self.rows > 0:
+                data = np.memmap(self._part_path, dtype=np.float64, mode='r', shape=shape)
+            else:
+                data = np.empty(shape, dtype=np.float64)
+            np.savez(self.path, **{name: data[:, i] for i, name in enumerate(self.names)})
+            del data
+            os.remove(self._part_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_log(path, columns=None):
+    """
+    Membaca log langkah (CSV atau NPZ) sebagai dict nama kolom -> array.
+    Jika columns diberikan, hanya kolom tersebut yang dimuat.
+    """
+    if path.endswith('.npz'):
+        with np.load(path) as data:
+            return {name: data[name] for name in (columns or data.files)}
+
+    with open(path) as f:
+        names = f.readline().strip().split(',')
+    usecols = [names.index(name) for name in columns] if columns else None
+    data = np.loadtxt(path, delimiter=',', skiprows=1, usecols=usecols, ndmin=2)
+    return {name: data[:, i] for i, name in enumerate(columns or names)}
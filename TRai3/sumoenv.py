@@ -1,7 +1,17 @@
+import collections
 import os
 import sys
+import tempfile
+import warnings
 import numpy as np
 import traci
+import traci.constants as tc
+
+# libsumo opsional: menjalankan SUMO di dalam proses yang sama tanpa socket TraCI
+try:
+    import libsumo
+except ImportError:
+    libsumo = None
 
 # Setup SUMO tools path
 if 'SUMO_HOME' in os.environ:
@@ -10,6 +20,59 @@ if 'SUMO_HOME' in os.environ:
 else:
     sys.exit("please declare environment variable 'SUMO_HOME'")
 
+
+def sumo_console_args(verbosity):
+    """
+    Opsi konsol SUMO untuk tingkat verbosity pengendali (0 senyap, 1 ringkasan, 2 per siklus):
+    di bawah 2 tanpa log per langkah, pada 0 juga tanpa peringatan. None = bawaan SUMO.
+    """
+    if verbosity >= 2:
+        return None
+    return ['--no-step-log'] + (['--no-warnings'] if verbosity <= 0 else [])
+
+class Junction:
+    """
+    Persimpangan berlampu yang dikendalikan: ID lampu dan jalur masuknya, dikelompokkan menurut
+    arah (ns_lanes Utara-Selatan, ew_lanes Timur-Barat). ns_phase adalah fase hijau program 4 fase
+    (hijau 0, kuning 1, hijau 2, kuning 3) yang melayani ns_lanes; fase hijau lainnya melayani ew_lanes.
+    """
+    def __init__(self, tl_id, ns_lanes, ew_lanes, lane_ids=None, ns_phase=0):
+        if ns_phase not in (0, 2):
+            raise ValueError(f"ns_phase harus 0 atau 2: {ns_phase!r}")
+        self.tl_id = tl_id
+        self.ns_lanes = list(ns_lanes)
+        self.ew_lanes = list(ew_lanes)
+        self.lane_ids = list(lane_ids) if lane_ids is not None else self.ns_lanes + self.ew_lanes
+        self.ns_phase = ns_phase
+        self.junction_id = None # Node jaringan pusat context subscription (ditentukan dari jalur masuk)
+        self.vehicle_data = {} # Hasil context subscription kendaraan di sekitar persimpangan
+        self.context_range = None
+
+    def green_lanes(self, phase):
+        """Jalur masuk yang dilayani fase hijau phase (0 atau 2)."""
+        return self.ns_lanes if phase == self.ns_phase else self.ew_lanes
+
+    def cycle(self, green_ns, green_ew, yellow_time):
+        """Satu siklus program sebagai daftar (fase, durasi), dengan hijau NS pada ns_phase."""
+        first, second = (green_ns, green_ew) if self.ns_phase == 0 else (green_ew, green_ns)
+        return [(0, first), (1, yellow_time), (2, second), (3, yellow_time)]
+
+class StepSnapshot:
+    """
+    Metrik satu persimpangan untuk satu langkah simulasi. Dihitung sekali per langkah oleh
+    SumoEnv.get_snapshot() dan dibaca bersama oleh logging, keadaan RL, hadiah, dan permintaan CSP.
+    """
+    def __init__(self, env, junction):
+        ns_queue, ns_waiting_sum, ns_count = env.get_lane_metrics(junction.ns_lanes, junction.vehicle_data)
+        ew_queue, ew_waiting_sum, ew_count = env.get_lane_metrics(junction.ew_lanes, junction.vehicle_data)
+
+        self.ns_queue = ns_queue
+        self.ew_queue = ew_queue
+        self.ns_avg_wait = (ns_waiting_sum / ns_count) if ns_count > 0 else 0.0
+        self.ew_avg_wait = (ew_waiting_sum / ew_count) if ew_count > 0 else 0.0
+        self.halting = ns_queue + ew_queue
+        self.waiting_time = sum(env.lane_data[lane_id][tc.VAR_WAITING_TIME] for lane_id in junction.lane_ids)
+
 class SumoEnv:
     place_len = 7.5
     place_offset = 8.50
@@ -20,66 +83,383 @@ class SumoEnv:
         '-gneE2_0','-gneE2_1','-gneE2_2',
         '-gneE3_0','-gneE3_1','-gneE3_2'
     ]
+    # Jalur untuk arah Utara-Selatan dan Timur-Barat
+    ns_lanes = ['-gneE0_0', '-gneE0_1', '-gneE0_2', '-gneE2_0', '-gneE2_1', '-gneE2_2']
+    ew_lanes = ['-gneE1_0', '-gneE1_1', '-gneE1_2', '-gneE3_0', '-gneE3_1', '-gneE3_2']
+    # Fase hijau yang melayani ns_lanes pada program intersection.net.xml (fase 0 melayani ew_lanes)
+    ns_phase = 2
+
+    # Sumbu koordinat (0 = x, 1 = y) dan tandanya untuk jarak ke persimpangan di setiap jalur pada lane_ids
+    lane_axis = np.array([1, 1, 1, 0, 0, 0, 1, 1, 1, 0, 0, 0])
+    lane_sign = np.array([1., 1., 1., 1., 1., 1., -1., -1., -1., -1., -1., -1.])
+    # Panjang vektor observasi get_state: grid okupansi ditambah one-hot fase
+    state_size = lane_len * 12 + 4
+
+    tl_id = 'gneJ00'
+    # Variabel jalur dan kendaraan yang dilanggan (subscribe), sehingga semua nilai
+    # per langkah datang dalam satu respons simulationStep, bukan satu panggilan per kendaraan
+    lane_vars = [tc.LAST_STEP_VEHICLE_ID_LIST, tc.LAST_STEP_VEHICLE_HALTING_NUMBER, tc.VAR_WAITING_TIME]
+    vehicle_vars = [tc.VAR_POSITION, tc.VAR_WAITING_TIME]
+    # Waktu simulasi dan daftar kendaraan yang berangkat/tiba pada langkah terakhir (untuk VehicleTracker)
+    simulation_vars = [tc.VAR_TIME, tc.VAR_DEPARTED_VEHICLES_IDS, tc.VAR_ARRIVED_VEHICLES_IDS]
+
+    backends = ('traci', 'libsumo')
+    # 'restart': luncurkan ulang SUMO setiap reset; 'state': pulihkan snapshot yang disimpan setelah warm-up
+    reset_modes = ('restart', 'state')
 
-    def __init__(self, label='default', gui_f=False):
+    def __init__(self, label='default', gui_f=False, backend='traci', route_file=None, seed=None, sumo_args=None,
+                 reset_mode='restart', warmup_steps=0, state_file=None, config_file='intersection.sumocfg', tl_ids=None,
+                 per_vehicle=True):
+        if backend not in self.backends:
+            raise ValueError(f"backend tidak dikenal: {backend!r} (pilihan: {', '.join(self.backends)})")
+        if reset_mode not in self.reset_modes:
+            raise ValueError(f"reset_mode tidak dikenal: {reset_mode!r} (pilihan: {', '.join(self.reset_modes)})")
+        if backend == 'libsumo':
+            if libsumo is None:
+                raise ImportError("backend 'libsumo' membutuhkan paket libsumo")
+            if gui_f:
+                raise ValueError("backend 'libsumo' tidak mendukung sumo-gui")
         self.label = label
+        self.backend = backend
+        # Modul/koneksi simulasi aktif (traci.Connection atau modul libsumo), API-nya identik
+        self.sim = None
         self.ncars = 0
+        self.step_length = 1.0 # Panjang langkah simulasi (detik), dibaca dari SUMO saat start
+        self.lane_data = {}
+        self.vehicle_data = {}
+        self.simulation_data = {}
+        self._snapshots = {}
+
+        # per_vehicle=False: tanpa context subscription kendaraan; metrik persimpangan dihitung dari
+        # agregat jalur saja (O(jalur) per langkah) dan observasi get_state tidak tersedia
+        self.per_vehicle = per_vehicle
+        if not per_vehicle:
+            self.lane_vars = [tc.LAST_STEP_VEHICLE_NUMBER, tc.LAST_STEP_VEHICLE_HALTING_NUMBER, tc.VAR_WAITING_TIME]
+
+        # tl_ids=None: persimpangan tunggal bawaan (tl_id, ns_lanes, ew_lanes, ns_phase di atas).
+        # 'all' atau daftar ID: persimpangan dan jalurnya ditemukan dari jaringan saat start pertama
+        self.tl_ids = tl_ids
+        self.junctions = {}
+        if tl_ids is None:
+            self.junctions[self.tl_id] = Junction(self.tl_id, self.ns_lanes, self.ew_lanes, self.lane_ids,
+                                                  self.ns_phase)
+
         exe = 'sumo-gui' if gui_f else 'sumo'
         sumoBinary = os.path.join(os.environ['SUMO_HOME'], 'bin', exe)
-        self.sumoCmd = [sumoBinary, '-c', 'intersection.sumocfg']
-    
+        self.sumoCmd = [sumoBinary, '-c', config_file]
+        # Opsi tambahan untuk menjalankan banyak skenario/seed (mis. dari experiment.py)
+        if route_file is not None:
+            self.sumoCmd += ['-r', route_file]
+        if seed is not None:
+            self.sumoCmd += ['--seed', str(seed)]
+        if sumo_args:
+            self.sumoCmd += list(sumo_args)
+
+        self.reset_mode = reset_mode
+        self.warmup_steps = warmup_steps
+        # File state yang diberikan eksplisit dan sudah ada dipakai ulang apa adanya (mis. dibagi antar proses);
+        # file default di direktori temp selalu dibuat ulang pada start pertama dan dihapus oleh close()
+        self.state_file = state_file or os.path.join(tempfile.gettempdir(), f'sumoenv_{label}_{os.getpid()}.xml')
+        self._owns_state_file = state_file is None
+        self._state_ready = state_file is not None and os.path.exists(state_file)
+        # SUMO juga menerapkan --output-prefix pada path saveState (path absolut menjadi tidak valid),
+        # jadi state yang akan disimpan ditempatkan di <prefix><nama file>, bersama output lain run ini,
+        # dan saveState hanya menerima nama filenya. loadState tidak terpengaruh prefix
+        self._save_state_name = self.state_file
+        output_prefix = self._output_prefix(sumo_args)
+        if output_prefix is not None and not self._state_ready:
+            self._save_state_name = os.path.basename(self.state_file)
+            self.state_file = output_prefix + self._save_state_name
+        if reset_mode == 'state':
+            # Simpan state RNG dan posisi/kecepatan dengan presisi penuh (default SUMO hanya 2 desimal).
+            # Catatan: memuat state ke proses baru mereproduksi simulasi aslinya persis; loadState di
+            # proses yang sedang berjalan memulihkan kendaraan yang sama, tetapi aliran RNG kendaraan
+            # tidak diputar ulang, sehingga episode berikutnya hanya identik secara statistik
+            self.sumoCmd += ['--save-state.rng', '--save-state.precision', '8']
+
+    @staticmethod
+    def _output_prefix(sumo_args):
+        """Nilai --output-prefix pada opsi SUMO tambahan, atau None."""
+        sumo_args = list(sumo_args or [])
+        if '--output-prefix' in sumo_args:
+            return sumo_args[sumo_args.index('--output-prefix') + 1]
+        return None
+
     def reset(self):
         self.ncars = 0
 
-        # Cegah error jika traci sudah terhubung sebelumnya
-        if traci.isLoaded():
+        if self.reset_mode == 'state' and self.sim is not None:
+            # Reset cepat: pulihkan snapshot tanpa meluncurkan ulang SUMO dan tanpa warm-up.
+            # Kendaraan episode sebelumnya dihapus dulu; jika tidak, reservasi jalur internal persimpangan
+            # mereka tertinggal setelah loadState dan memicu tabrakan/gridlock pada episode berikutnya
+            for veh_id in self.sim.vehicle.getIDList():
+                self.sim.vehicle.remove(veh_id)
+            self.sim.simulationStep()
+            self.sim.simulation.loadState(self.state_file)
+        else:
+            # Cegah error jika simulasi sudah terhubung sebelumnya
+            if self.sim is not None:
+                try:
+                    self.close()
+                except:
+                    pass
+
+            self._start()
+            self.step_length = self.sim.simulation.getDeltaT()
+            if not self.junctions:
+                self.discover_junctions()
+            if self.reset_mode == 'state':
+                self._prepare_state()
+        # loadState menghapus subscription, jadi subscription dipasang ulang setiap reset
+        self._subscribe()
+        for tl_id in self.junctions:
+            self.sim.trafficlight.setProgram(tl_id, '0')  # pastikan program id = '0'
+        self.sim.simulationStep()
+        self._collect()
+        # Observasi grid okupansi hanya didefinisikan untuk tata letak persimpangan tunggal bawaan
+        return self.get_state() if self.tl_ids is None and self.per_vehicle else None
+
+    def _start(self):
+        if self.backend == 'libsumo':
+            libsumo.start(self.sumoCmd)
+            self.sim = libsumo
+        else:
+            traci.start(self.sumoCmd, label=self.label)
+            self.sim = traci.getConnection(self.label)
+
+    def _prepare_state(self):
+        if self._state_ready:
+            self.sim.simulation.loadState(self.state_file)
+            return
+        for tl_id in self.junctions:
+            self.sim.trafficlight.setProgram(tl_id, '0')
+        for _ in range(self.warmup_steps):
+            self.sim.simulationStep()
+        self.sim.simulation.saveState(self._save_state_name)
+        self._state_ready = True
+
+    def phase_lanes(self, tl_id):
+        """
+        Jalur masuk lampu tl_id menurut program '0' yang sedang berjalan: (jalur fase hijau 0,
+        jalur fase hijau 2, semua jalur masuk). Setiap jalur masuk dimasukkan ke fase hijau
+        yang paling banyak memberi hijau pada link-nya.
+        """
+        logic = next(logic for logic in self.sim.trafficlight.getAllProgramLogics(tl_id)
+                     if logic.programID == '0')
+        if len(logic.phases) != 4:
+            raise ValueError(f"Lampu {tl_id!r} memiliki {len(logic.phases)} fase; pengendali "
+                             f"membutuhkan program 4 fase (hijau, kuning, hijau, kuning)")
+        green_states = (logic.phases[0].state, logic.phases[2].state)
+
+        served = {} # jalur masuk -> [jumlah link hijau pada fase 0, pada fase 2]
+        for link_index, links in enumerate(self.sim.trafficlight.getControlledLinks(tl_id)):
+            for incoming, _, _ in links:
+                counts = served.setdefault(incoming, [0, 0])
+                for k, state in enumerate(green_states):
+                    if state[link_index] in 'Gg':
+                        counts[k] += 1
+        phase0_lanes = [lane for lane, (first, second) in served.items() if first > 0 and first >= second]
+        phase2_lanes = [lane for lane, (first, second) in served.items() if second > first]
+        return phase0_lanes, phase2_lanes, list(served)
+
+    def _is_vertical(self, lanes):
+        """True jika segmen akhir jalur (menuju persimpangan) secara total lebih ke arah y daripada x."""
+        dx = dy = 0.
+        for lane_id in lanes:
+            (x1, y1), (x2, y2) = self.sim.lane.getShape(lane_id)[-2:]
+            dx += abs(x2 - x1)
+            dy += abs(y2 - y1)
+        return dy > dx
+
+    def discover_junctions(self):
+        """
+        Menemukan persimpangan berlampu (semua, atau tl_ids yang diminta) dan jalur masuk yang
+        dikendalikannya dari jaringan yang sedang berjalan (lihat phase_lanes). Kelompok jalur fase
+        hijau yang lebih vertikal menjadi ns_lanes, jadi penamaan arah sama dengan tata letak bawaan.
+        Dengan tl_ids='all', lampu yang programnya tidak didukung dilewati dengan peringatan.
+        """
+        tl_ids = self.sim.trafficlight.getIDList() if self.tl_ids == 'all' else self.tl_ids
+        junctions = {}
+        for tl_id in tl_ids:
             try:
-                traci.close()
-            except:
-                pass
-
-        traci.start(self.sumoCmd, label=self.label)
-        traci.trafficlight.setProgram('gneJ00', '0')  # pastikan program id = '0'
-        traci.simulationStep()
-        return self.get_state()
-
-    def get_state(self):
-        state = np.zeros(self.lane_len * 12 + 4, dtype=np.float32)
-        for ilane in range(12):
-            lane_id = self.lane_ids[ilane]
-            cars = traci.lane.getLastStepVehicleIDs(lane_id)
-            for icar in cars:
-                xcar, ycar = traci.vehicle.getPosition(icar)
-                if ilane < 3:
-                    pos = (ycar - self.place_offset) / self.place_len
-                elif ilane < 6:
-                    pos = (xcar - self.place_offset) / self.place_len
-                elif ilane < 9:
-                    pos = (-ycar - self.place_offset) / self.place_len
-                else:
-                    pos = (-xcar - self.place_offset) / self.place_len
-                if pos > self.lane_len - 1.:
-                    continue
-                pos = np.clip(pos, 0., self.lane_len - 1. - 1e-6)
-                ipos = int(pos)
-                state[ilane * self.lane_len + ipos] += 1. - pos + ipos
-                state[ilane * self.lane_len + ipos + 1] += pos - ipos
-
-        phase = traci.trafficlight.getPhase('gneJ00')
-        state[self.lane_len * 12 : self.lane_len * 12 + 4] = np.eye(4)[phase]
-        return state
+                phase0_lanes, phase2_lanes, lane_ids = self.phase_lanes(tl_id)
+            except ValueError as e:
+                if self.tl_ids != 'all':
+                    raise
+                warnings.warn(f"Lampu {tl_id!r} dilewati: {e}")
+                continue
+            if self._is_vertical(phase2_lanes) and not self._is_vertical(phase0_lanes):
+                junctions[tl_id] = Junction(tl_id, phase2_lanes, phase0_lanes, lane_ids, ns_phase=2)
+            else:
+                junctions[tl_id] = Junction(tl_id, phase0_lanes, phase2_lanes, lane_ids, ns_phase=0)
+
+        if not junctions:
+            raise ValueError("Tidak ada persimpangan berlampu yang didukung di jaringan")
+        self.junctions = junctions
+        self.tl_id = next(iter(junctions)) # Persimpangan utama untuk get_snapshot()/get_waiting_time() tanpa argumen
+        return junctions
+
+    def _context_junction(self, junction):
+        """
+        Node jaringan untuk context subscription lampu junction: node tujuan yang paling sering dari
+        jalur masuknya. ID lampu tidak selalu ID node (mis. lampu gabungan beberapa node).
+        """
+        nodes = collections.Counter(self.sim.edge.getToJunction(self.sim.lane.getEdgeID(lane_id))
+                                    for lane_id in junction.lane_ids)
+        return nodes.most_common(1)[0][0]
+
+    def _subscribe(self):
+        self.sim.simulation.subscribe(self.simulation_vars)
+
+        # Jalur dari semua persimpangan dilanggan sekali; hasilnya datang bersama di setiap langkah
+        for lane_id in dict.fromkeys(lane_id for junction in self.junctions.values() for lane_id in junction.lane_ids):
+            self.sim.lane.subscribe(lane_id, self.lane_vars)
+
+        # Context subscription di sekitar tiap persimpangan; radius mencakup seluruh jalur masuknya
+        for junction in self.junctions.values() if self.per_vehicle else ():
+            if junction.context_range is None:
+                junction.junction_id = self._context_junction(junction)
+                jx, jy = self.sim.junction.getPosition(junction.junction_id)
+                junction.context_range = max(np.hypot(x - jx, y - jy)
+                                             for lane_id in junction.lane_ids
+                                             for x, y in self.sim.lane.getShape(lane_id)) + 1.
+            self.sim.junction.subscribeContext(junction.junction_id, tc.CMD_GET_VEHICLE_VARIABLE,
+                                               junction.context_range, self.vehicle_vars)
+
+    def _collect(self):
+        # Hasil subscription diperbarui pada setiap langkah, jadi cukup simpan referensinya
+        self.lane_data = self.sim.lane.getAllSubscriptionResults()
+        self.simulation_data = self.sim.simulation.getSubscriptionResults()
+        if self.per_vehicle:
+            for junction in self.junctions.values():
+                junction.vehicle_data = self.sim.junction.getContextSubscriptionResults(junction.junction_id)
+            self.vehicle_data = self.junctions[self.tl_id].vehicle_data
+        self._snapshots = {}
+
+    def get_snapshot(self, tl_id=None):
+        """
+        Mengembalikan StepSnapshot langkah saat ini untuk persimpangan tl_id (default: persimpangan utama);
+        dihitung sekali dan di-cache sampai langkah berikutnya.
+        """
+        tl_id = tl_id or self.tl_id
+        snapshot = self._snapshots.get(tl_id)
+        if snapshot is None:
+            snapshot = self._snapshots[tl_id] = StepSnapshot(self, self.junctions[tl_id])
+        return snapshot
+
+    def get_snapshots(self):
+        """Mengembalikan StepSnapshot semua persimpangan untuk langkah saat ini sebagai dict tl_id -> snapshot."""
+        return {tl_id: self.get_snapshot(tl_id) for tl_id in self.junctions}
+
+    def get_lane_metrics(self, lanes, vehicle_data=None):
+        """
+        Mengembalikan (jumlah kendaraan berhenti, jumlah waktu tunggu kendaraan, jumlah kendaraan)
+        untuk jalur yang diberikan, dari hasil subscription langkah terakhir.
+        """
+        if vehicle_data is None:
+            vehicle_data = self.vehicle_data
+        halting = 0
+        waiting_sum = 0.0
+        vehicle_count = 0
+        for lane_id in lanes:
+            lane = self.lane_data[lane_id]
+            halting += lane[tc.LAST_STEP_VEHICLE_HALTING_NUMBER]
+            if not self.per_vehicle:
+                # Agregat jalur: waktu tunggu jalur = jumlah waktu tunggu kendaraan di jalur itu
+                waiting_sum += lane[tc.VAR_WAITING_TIME]
+                vehicle_count += lane[tc.LAST_STEP_VEHICLE_NUMBER]
+                continue
+            for veh_id in lane[tc.LAST_STEP_VEHICLE_ID_LIST]:
+                waiting_sum += vehicle_data[veh_id][tc.VAR_WAITING_TIME]
+                vehicle_count += 1
+        return halting, waiting_sum, vehicle_count
+
+    def get_lane_vehicle_count(self, lanes):
+        """Jumlah kendaraan (berhenti maupun bergerak) di jalur yang diberikan, dari subscription langkah terakhir."""
+        if self.per_vehicle:
+            return sum(len(self.lane_data[lane_id][tc.LAST_STEP_VEHICLE_ID_LIST]) for lane_id in lanes)
+        return sum(self.lane_data[lane_id][tc.LAST_STEP_VEHICLE_NUMBER] for lane_id in lanes)
+
+    def get_state(self, out=None):
+        """
+        Observasi untuk pengendali yang belajar: grid okupansi 12 jalur x lane_len sel dengan
+        interpolasi linear posisi kendaraan, diikuti one-hot fase lampu (4 nilai).
+        Jika out (array float32 berukuran state_size) diberikan, hasil ditulis ke sana tanpa alokasi baru.
+        """
+        if out is None:
+            out = np.zeros(self.state_size, dtype=np.float32)
+        else:
+            out.fill(0.)
+
+        lanes = []
+        positions = []
+        for ilane, lane_id in enumerate(self.lane_ids):
+            for veh_id in self.lane_data[lane_id][tc.LAST_STEP_VEHICLE_ID_LIST]:
+                lanes.append(ilane)
+                positions.append(self.vehicle_data[veh_id][tc.VAR_POSITION])
+
+        if lanes:
+            lanes = np.array(lanes)
+            positions = np.array(positions)
+            # Jarak ke persimpangan sepanjang sumbu jalur masing-masing (y, x, -y, -x)
+            coord = positions[np.arange(len(lanes)), self.lane_axis[lanes]] * self.lane_sign[lanes]
+            pos = (coord - self.place_offset) / self.place_len
+            keep = pos <= self.lane_len - 1.
+            lanes = lanes[keep]
+            pos = np.clip(pos[keep], 0., self.lane_len - 1. - 1e-6)
+            ipos = pos.astype(np.intp)
+            cells = lanes * self.lane_len + ipos
+            # Bobot sel ipos dan ipos+1 disisipkan berselang-seling agar urutan akumulasi sama dengan loop skalar
+            np.add.at(out, np.stack([cells, cells + 1], axis=1).ravel(),
+                      np.stack([1. - pos + ipos, pos - ipos], axis=1).ravel())
+
+        phase = self.sim.trafficlight.getPhase(self.tl_id)
+        out[self.lane_len * 12 + phase] = 1.
+        return out
+
+    def get_time(self):
+        """Waktu simulasi (detik) setelah langkah terakhir."""
+        return self.simulation_data[tc.VAR_TIME]
+
+    def get_departed_ids(self):
+        """ID kendaraan yang berangkat pada langkah terakhir."""
+        return self.simulation_data[tc.VAR_DEPARTED_VEHICLES_IDS]
+
+    def get_arrived_ids(self):
+        """ID kendaraan yang tiba di tujuan pada langkah terakhir."""
+        return self.simulation_data[tc.VAR_ARRIVED_VEHICLES_IDS]
+
+    def get_vehicle_ids(self):
+        """ID semua kendaraan yang sedang berada di jaringan."""
+        return self.sim.vehicle.getIDList()
 
     def get_waiting_time(self):
-        return sum(traci.lane.getWaitingTime(lane_id) for lane_id in self.lane_ids)
+        return self.get_snapshot().waiting_time
 
-    def set_traffic_light_phase(self, phase, duration):
-        traci.trafficlight.setPhase('gneJ00', phase)
-        traci.trafficlight.setPhaseDuration('gneJ00', duration)
+    def set_traffic_light_phase(self, phase, duration, tl_id=None):
+        tl_id = tl_id or self.tl_id
+        self.sim.trafficlight.setPhase(tl_id, phase)
+        self.sim.trafficlight.setPhaseDuration(tl_id, duration)
 
-    def simulation_step(self):
-        traci.simulationStep()
-        self.ncars += traci.simulation.getDepartedNumber()
+    def simulation_step(self, steps=1):
+        """
+        Memajukan simulasi steps langkah. Untuk steps > 1 dipakai satu simulationStep(targetTime),
+        jadi hanya satu round-trip TraCI; hasil subscription (termasuk daftar kendaraan berangkat/tiba
+        dan ncars) hanya mencerminkan langkah terakhir.
+        """
+        if steps == 1:
+            self.sim.simulationStep()
+        else:
+            self.sim.simulationStep(self.get_time() + steps * self.step_length)
+        self._collect()
+        self.ncars += len(self.get_departed_ids())
 
     def close(self):
-        if traci.isLoaded():
-            traci.close()
+        if self.sim is not None:
+            sim, self.sim = self.sim, None
+            sim.close()
+        if self._owns_state_file and self._state_ready:
+            # File state default milik env ini; start berikutnya membuatnya ulang
+            self._state_ready = False
+            if os.path.exists(self.state_file):
+                os.remove(self.state_file)
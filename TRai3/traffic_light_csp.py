@@ -1,41 +1,66 @@
-import traci
-import sys
-from constraint import Problem, BacktrackingSolver
-import numpy as np
-from sumoenv import SumoEnv # Asumsikan SumoEnv tersedia dan dikonfigurasi dengan benar
-import collections
+import argparse
+from sumoenv import SumoEnv, sumo_console_args # Asumsikan SumoEnv tersedia dan dikonfigurasi dengan benar
+from controller import TrafficLightController
+from green_split import GreenSplitTable, CachedCSPSolver, constraint_flags
+from q_table import ACTIONS, STATE_SHAPE, QTable
+from replay_buffer import ReplayBuffer
+from detectors import LiveDetectors, read_detector_interval, read_detector_lanes
+from instrumentation import Instrumentation
+from results_store import store_run
 import random
 
-class TrafficLightCSP:
-    def __init__(self):
-        # Inisialisasi lingkungan SUMO
-        self.env = SumoEnv(label='csp_sim', gui_f=True)
-        self.tl_id = "gneJ00" # ID lampu lalu lintas
-        # Jalur untuk arah Utara-Selatan dan Timur-Barat
-        self.ns_lanes = ['-gneE0_0', '-gneE0_1', '-gneE0_2', '-gneE2_0', '-gneE2_1', '-gneE2_2']
-        self.ew_lanes = ['-gneE1_0', '-gneE1_1', '-gneE1_2', '-gneE3_0', '-gneE3_1', '-gneE3_2']
+class TrafficLightCSP(TrafficLightController):
+    """
+    Kebijakan CSP + RL: waktu hijau target dari rasio permintaan NS/EW, disesuaikan oleh agen
+    Q-learning, lalu diselesaikan CSP green-split. Loop simulasi ada di TrafficLightController.
+    """
+    name = 'Lampu Lalu Lintas Adaptif CSP + RL'
+
+    # Tindakan RL dan bentuk keadaan didefinisikan di q_table (tanpa SUMO, dipakai juga offline_train)
+    actions = ACTIONS
+    state_shape = STATE_SHAPE
+
+    def __init__(self, gui_f=False, backend='traci', log_file='queue_length.txt', csp_solver='table', env=None, tl_id=None,
+                 demand_source='vehicles', detector_file='detector.add.xml', instrumentation=None,
+                 max_simulation_steps=500, verbosity=2, sample_interval=1, replay_file=None):
+        # Sumber metrik permintaan CSP:
+        # 'vehicles'  - waktu tunggu dari data per kendaraan (context subscription di SumoEnv)
+        # 'detectors' - hanya agregat jalur (antrian, waktu tunggu jalur) ditambah kedatangan dari detektor e1
+        if demand_source not in ('vehicles', 'detectors'):
+            raise ValueError(f"demand_source tidak dikenal: {demand_source!r}")
+        self.demand_source = demand_source
+
+        # Inisialisasi lingkungan SUMO (backend 'traci' via socket atau 'libsumo' di dalam proses).
+        # SumoEnv yang sudah dikonfigurasi (label, rute, seed) dapat diberikan lewat env
+        if env is None:
+            env = SumoEnv(label='csp_sim', gui_f=gui_f, backend=backend, sumo_args=sumo_console_args(verbosity),
+                          per_vehicle=demand_source == 'vehicles')
+        super().__init__(env, log_file, tl_id=tl_id, instrumentation=instrumentation,
+                         max_simulation_steps=max_simulation_steps, verbosity=verbosity,
+                         sample_interval=sample_interval)
 
         # Durasi fase lampu lalu lintas
         self.min_green = 20  # Waktu hijau minimum dalam detik
         self.max_green = 60  # Waktu hijau maksimum dalam detik
         self.yellow_time = 5 # Durasi fase kuning
         self.red_time = 0    # Fase merah (biasanya 0 karena kuning menangani transisi)
-
-        # Metrik simulasi
-        self.step = 0 # Langkah simulasi saat ini
-        self.total_vehicles_departed = 0 # Total kendaraan yang telah menyelesaikan perjalanan
-        self.total_waiting_time = 0.0 # Waktu tunggu akumulatif semua kendaraan
-        self.vehicle_travel_times = {} # Menyimpan waktu tempuh untuk setiap kendaraan yang berangkat
-        self.vehicle_departure_times = {} # Menyimpan waktu keberangkatan untuk setiap kendaraan
-
-        # Metrik lalu lintas saat ini untuk logging dan keadaan RL
-        self.current_ns_waiting_time = 0.0
-        self.current_ew_waiting_time = 0.0
-        self.current_ns_queue_length = 0
-        self.current_ew_queue_length = 0
-
-        # Langkah simulasi maksimum
-        self.max_simulation_steps = 500
+        self.cycle_length = 120 # Panjang siklus penuh (hijau NS + kuning + hijau EW + kuning)
+
+        # Detektor e1 untuk demand_source='detectors': ID detektor -> jalur, dari file additional
+        self.detectors = None
+        if demand_source == 'detectors':
+            self.detector_lanes = read_detector_lanes(detector_file)
+            self.detectors = LiveDetectors(self.env, detector_ids=self.detector_lanes,
+                                           interval=read_detector_interval(detector_file))
+
+        # Solver CSP green-split: 'table' (tabel yang dibangun sekali per kombinasi batasan)
+        # atau 'backtracking' (python-constraint dengan cache LRU atas input batasan)
+        if csp_solver == 'table':
+            self.green_split = GreenSplitTable(self.min_green, self.max_green, self.yellow_time, self.cycle_length)
+        elif csp_solver == 'backtracking':
+            self.green_split = CachedCSPSolver(self.min_green, self.max_green, self.yellow_time, self.cycle_length)
+        else:
+            raise ValueError(f"csp_solver tidak dikenal: {csp_solver!r}")
 
         # Reinforcement Learning (RL) Parameters
         # PASTIKAN BAGIAN INI ADA DI DALAM __init__
@@ -45,106 +70,33 @@ class TrafficLightCSP:
         self.min_epsilon = 0.01     # Tingkat eksplorasi minimum
         self.epsilon_decay_rate = 0.995 # Tingkat penurunan epsilon per langkah
 
-        # Tindakan RL: Penyesuaian waktu hijau target (penyesuaian NS, penyesuaian EW) dalam detik
-        # Penyesuaian ini akan diterapkan pada waktu hijau berbasis permintaan sebelum CSP
-        self.actions = [
-            (0, 0),    # Tidak ada perubahan
-            (5, 0),    # Tingkatkan hijau NS sebesar 5 detik
-            (-5, 0),   # Kurangi hijau NS sebesar 5 detik
-            (0, 5),    # Tingkatkan hijau EW sebesar 5 detik
-            (0, -5),   # Kurangi hijau EW sebesar 5 detik
-            (5, 5),    # Tingkatkan keduanya sebesar 5 detik
-            (-5, -5),  # Kurangi keduanya sebesar 5 detik
-            (5, -5),   # Tingkatkan NS, Kurangi EW sebesar 5 detik
-            (-5, 5)    # Kurangi NS, Tingkatkan EW sebesar 5 detik
-        ]
         self.num_actions = len(self.actions)
-        # Q-table: Menyimpan nilai-Q untuk pasangan (keadaan, tindakan).
-        # defaultdict memungkinkan keadaan baru diinisialisasi dengan nol untuk semua tindakan.
-        self.q_table = collections.defaultdict(lambda: np.zeros(self.num_actions))
-
-    def _update_vehicle_metrics(self):
-        """
-        Memperbarui metrik terkait keberangkatan kendaraan dan waktu tempuh.
-        Dipanggil pada setiap langkah simulasi.
-        """
-        # Melacak waktu keberangkatan untuk kendaraan baru
-        for veh_id in traci.vehicle.getIDList():
-            if veh_id not in self.vehicle_departure_times:
-                self.vehicle_departure_times[veh_id] = self.step
-
-        # Menghitung waktu tempuh untuk kendaraan yang telah tiba
-        arrived_vehicles = traci.simulation.getArrivedIDList()
-        for veh_id in arrived_vehicles:
-            if veh_id in self.vehicle_departure_times:
-                travel_time = self.step - self.vehicle_departure_times[veh_id]
-                self.vehicle_travel_times[veh_id] = travel_time
-                del self.vehicle_departure_times[veh_id] # Hapus dari pelacakan setelah tiba
-
-    def _get_current_lane_metrics(self):
-        """
-        Menghitung dan memperbarui panjang antrian dan waktu tunggu saat ini untuk jalur NS dan EW.
-        Metrik ini digunakan untuk perhitungan permintaan CSP dan definisi keadaan RL.
+        # Q-table: Menyimpan nilai-Q untuk pasangan (keadaan, tindakan) dalam satu array padat
+        # (4^4 = 256 keadaan x 9 tindakan), diinisialisasi dengan nol untuk semua tindakan.
+        self.q_table = QTable(self.state_shape, self.num_actions)
+        self._pending_cycle = None # (keadaan, indeks tindakan) siklus yang sedang berjalan, untuk pembaruan RL
+        # Setiap transisi (s, a, r, s') juga ditambahkan ke file replay untuk pelatihan offline (offline_train.py)
+        self.replay = ReplayBuffer(replay_file, len(self.state_shape)) if replay_file else None
+
+    def save_checkpoint(self, path):
         """
-        ns_queue = 0
-        ew_queue = 0
-        ns_waiting_sum = 0.0
-        ew_waiting_sum = 0.0
-        ns_vehicle_count_for_avg_wait = 0
-        ew_vehicle_count_for_avg_wait = 0
-
-        # Menggabungkan metrik untuk jalur Utara-Selatan
-        for lane in self.ns_lanes:
-            ns_queue += traci.lane.getLastStepHaltingNumber(lane) # Jumlah kendaraan yang berhenti
-            current_lane_vehicles = traci.lane.getLastStepVehicleIDs(lane)
-            for veh_id in current_lane_vehicles:
-                ns_waiting_sum += traci.vehicle.getWaitingTime(veh_id)
-                ns_vehicle_count_for_avg_wait += 1
-
-        # Menggabungkan metrik untuk jalur Timur-Barat
-        for lane in self.ew_lanes:
-            ew_queue += traci.lane.getLastStepHaltingNumber(lane)
-            current_lane_vehicles = traci.lane.getLastStepVehicleIDs(lane)
-            for veh_id in current_lane_vehicles:
-                ew_waiting_sum += traci.vehicle.getWaitingTime(veh_id)
-                ew_vehicle_count_for_avg_wait += 1
-
-        # Menghitung waktu tunggu rata-rata
-        self.current_ns_waiting_time = (ns_waiting_sum / ns_vehicle_count_for_avg_wait) if ns_vehicle_count_for_avg_wait > 0 else 0.0
-        self.current_ew_waiting_time = (ew_waiting_sum / ew_vehicle_count_for_avg_wait) if ew_vehicle_count_for_avg_wait > 0 else 0.0
-
-        # Memperbarui panjang antrian saat ini
-        self.current_ns_queue_length = ns_queue
-        self.current_ew_queue_length = ew_queue
-
-    def _run_phase(self, phase_duration, phase_id):
+        Menyimpan tabel-Q dan epsilon ke file .npz. Tabel-Q disimpan sebagai array padat
+        berbentuk state_shape + (num_actions,), diindeks langsung dengan tuple keadaan dari _get_state.
         """
-        Menjalankan satu fase lampu lalu lintas untuk durasi yang diberikan.
-        Memajukan simulasi SUMO langkah demi langkah.
-        """
-        self.env.set_traffic_light_phase(phase_id, phase_duration)
-        for _ in range(int(phase_duration)):
-            # Berhenti jika langkah simulasi maksimum tercapai
-            if self.step >= self.max_simulation_steps:
-                break
-
-            self.env.simulation_step() # Majukan simulasi SUMO satu langkah
-            self._update_vehicle_metrics() # Perbarui metrik pelacakan kendaraan
-
-            # Dapatkan total kendaraan yang berhenti dan waktu tunggu untuk logging
-            total_halting_vehicles = sum(traci.lane.getLastStepHaltingNumber(lane) for lane in self.ns_lanes + self.ew_lanes)
-            current_total_waiting_time_step = self.env.get_waiting_time()
-            self.total_waiting_time += current_total_waiting_time_step
-
-            # Perbarui metrik jalur saat ini untuk logging real-time di dalam fase
-            self._get_current_lane_metrics()
-
-            # Tulis data langkah simulasi saat ini ke file log
-            with open('queue_length.txt', 'a') as f:
-                f.write(f"{self.step},{total_halting_vehicles},{current_total_waiting_time_step},"
-                        f"{self.current_ns_queue_length},{self.current_ew_queue_length},"
-                        f"{self.current_ns_waiting_time:.2f},{self.current_ew_waiting_time:.2f}\n")
-            self.step += 1 # Tambah penghitung langkah simulasi
+        self.q_table.save(path, exploration_rate=self.exploration_rate)
+
+    def load_checkpoint(self, path):
+        """Memuat tabel-Q dan epsilon dari checkpoint (warm start untuk pelatihan atau evaluasi)."""
+        extra = self.q_table.load(path)
+        self.exploration_rate = float(extra['exploration_rate'])
+
+    def start_episode(self):
+        if self.detectors is not None:
+            self.detectors.reset()
+
+    def observe_step(self, snapshot):
+        if self.detectors is not None:
+            self.detectors.update() # Hanya membaca TraCI saat interval detektor berakhir
 
     # --- Metode Pembantu Reinforcement Learning (RL) ---
 
@@ -180,7 +132,7 @@ class TrafficLightCSP:
         if random.uniform(0, 1) < self.exploration_rate: # Menggunakan self.exploration_rate (epsilon)
             return random.randrange(self.num_actions) # Eksplorasi: pilih indeks tindakan acak
         else:
-            return np.argmax(self.q_table[state]) # Eksploitasi: pilih tindakan dengan nilai-Q tertinggi
+            return self.q_table.best_action(state) # Eksploitasi: pilih tindakan dengan nilai-Q tertinggi
 
     def _calculate_reward(self):
         """
@@ -198,173 +150,172 @@ class TrafficLightCSP:
         Memperbarui tabel-Q menggunakan formula Q-learning.
         Q(s, a) = Q(s, a) + alpha * [reward + gamma * max(Q(s', a')) - Q(s, a)]
         """
-        old_value = self.q_table[state][action_index]
-        next_max = np.max(self.q_table[next_state]) # Nilai-Q maksimum untuk keadaan berikutnya
-        new_value = old_value + self.learning_rate * (reward + self.discount_factor * next_max - old_value)
-        self.q_table[state][action_index] = new_value
-
-    def run(self):
+        self.q_table.update(state, action_index, reward, next_state,
+                            self.learning_rate, self.discount_factor)
+
+    def _demand_metrics(self):
+        """Metrik permintaan NS dan EW: antrian + waktu tunggu rata-rata x 5 (+ kedatangan dari detektor)."""
+        ns_demand_metric = self.current_ns_queue_length + (self.current_ns_waiting_time * 5)
+        ew_demand_metric = self.current_ew_queue_length + (self.current_ew_waiting_time * 5)
+        if self.detectors is not None:
+            ns_arrivals, ew_arrivals = self._detector_arrivals()
+            ns_demand_metric += ns_arrivals
+            ew_demand_metric += ew_arrivals
+        return ns_demand_metric, ew_demand_metric
+
+    def _detector_arrivals(self):
+        """
+        Perkiraan kedatangan NS dan EW selama satu siklus, dari jumlah kendaraan yang melewati
+        detektor e1 pada interval terakhir yang selesai (0 sebelum interval pertama selesai).
         """
-        Loop simulasi utama.
-        Mengintegrasikan pengambilan keputusan RL dengan pemenuhan batasan CSP.
+        latest = self.detectors.aggregator.latest()
+        if latest is None:
+            return 0.0, 0.0
+        junction = self.junction
+        scale = self.cycle_length / self.detectors.interval
+        ns_arrivals = sum(count for det_id, count in zip(self.detectors.detector_ids, latest['vehicles'])
+                          if self.detector_lanes[det_id] in junction.ns_lanes)
+        ew_arrivals = sum(count for det_id, count in zip(self.detectors.detector_ids, latest['vehicles'])
+                          if self.detector_lanes[det_id] in junction.ew_lanes)
+        return ns_arrivals * scale, ew_arrivals * scale
+
+    def _plan_cycle(self):
         """
-        self.env.reset() # Atur ulang lingkungan simulasi SUMO
-
-        # Inisialisasi/bersihkan file log
-        with open('queue_length.txt', 'w') as f:
-            f.write("step,total_halting_vehicles,total_waiting_time_step,ns_queue,ew_queue,ns_avg_wait_current,ew_avg_wait_current\n")
-
-        try:
-            while self.step < self.max_simulation_steps:
-                # 1. Dapatkan metrik lalu lintas saat ini untuk keadaan saat ini (sebelum keputusan RL/CSP)
-                self._get_current_lane_metrics()
-                current_state = self._get_state()
-
-                # 2. Agen RL memilih tindakan (penyesuaian waktu hijau) berdasarkan keadaan saat ini
-                action_index = self._choose_action(current_state)
-                adjustment_ns, adjustment_ew = self.actions[action_index]
-
-                # 3. Hitung waktu hijau target CSP awal berdasarkan rasio permintaan saat ini
-                ns_demand_metric = self.current_ns_queue_length + (self.current_ns_waiting_time * 5)
-                ew_demand_metric = self.current_ew_queue_length + (self.current_ew_waiting_time * 5)
-
-                # Pastikan metrik permintaan setidaknya 1 untuk menghindari pembagian dengan nol
-                ns_demand_metric = max(ns_demand_metric, 1)
-                ew_demand_metric = max(ew_demand_metric, 1)
-
-                total_demand = ns_demand_metric + ew_demand_metric
-                ns_ratio = ns_demand_metric / total_demand
-                ew_ratio = ew_demand_metric / total_demand
-
-                total_green_budget = 120 - (2 * self.yellow_time) # Total waktu hijau yang tersedia dalam satu siklus
-                target_green_ns = int(total_green_budget * ns_ratio)
-                target_green_ew = int(total_green_budget * ew_ratio)
-
-                # 4. Terapkan penyesuaian RL ke waktu hijau target berbasis permintaan
-                # Pastikan target yang disesuaikan tetap dalam batas waktu hijau min/maks
-                adjusted_target_green_ns = max(self.min_green, min(self.max_green, target_green_ns + adjustment_ns))
-                adjusted_target_green_ew = max(self.min_green, min(self.max_green, target_green_ew + adjustment_ew))
-
-                # 5. CSP menyelesaikan waktu hijau akhir, dipandu oleh target yang disesuaikan RL
-                csp = Problem(BacktrackingSolver(forwardcheck=True))
-
-                # Tentukan domain variabel untuk green_ns dan green_ew.
-                # Domain dipusatkan di sekitar target yang disesuaikan RL, dengan buffer +/- 10 detik.
-                csp.addVariable('green_ns', range(max(self.min_green, adjusted_target_green_ns - 10), min(self.max_green, adjusted_target_green_ns + 10) + 1))
-                csp.addVariable('green_ew', range(max(self.min_green, adjusted_target_green_ew - 10), min(self.max_green, adjusted_target_green_ew + 10) + 1))
-
-                # Batasan CSP yang ada:
-                # Pastikan total panjang siklus tidak melebihi 120 detik
-                csp.addConstraint(lambda ns, ew: ns + ew + 2 * self.yellow_time <= 120, ('green_ns', 'green_ew'))
-                # Pastikan kedua fase mendapatkan setidaknya waktu hijau minimum gabungan mereka
-                csp.addConstraint(lambda ns, ew: ns + ew >= 2 * self.min_green, ('green_ns', 'green_ew'))
-
-                # Batasan berdasarkan waktu tunggu saat ini untuk menyeimbangkan lalu lintas
-                if self.current_ns_waiting_time > 0 and self.current_ew_waiting_time > 0:
-                    if self.current_ns_waiting_time > self.current_ew_waiting_time * 1.5:
-                        # Jika waktu tunggu NS jauh lebih tinggi, prioritaskan hijau NS
-                        csp.addConstraint(lambda ns, ew: ns >= ew * 1.05, ('green_ns', 'green_ew'))
-                    elif self.current_ew_waiting_time > self.current_ns_waiting_time * 1.5:
-                        # Jika waktu tunggu EW jauh lebih tinggi, prioritaskan hijau EW
-                        csp.addConstraint(lambda ns, ew: ew >= ns * 1.05, ('green_ns', 'green_ew'))
-
-                # Batasan berdasarkan panjang antrian untuk memastikan keadilan
-                if self.current_ns_queue_length > 5 and self.current_ew_queue_length > 5:
-                    # Jaga agar waktu hijau relatif seimbang jika kedua antrian signifikan
-                    csp.addConstraint(lambda ns, ew: abs(ns - ew) <= (self.max_green - self.min_green) / 2, ('green_ns', 'green_ew'))
-
-                # Batasan khusus untuk waktu tunggu yang sangat tinggi
-                if self.current_ew_waiting_time >= 25:
-                    if self.current_ns_waiting_time > 5:
-                        # Jika waktu tunggu EW sangat tinggi, pastikan NS mendapatkan minimum yang wajar
-                        csp.addConstraint(lambda ns, ew: ns >= max(ew * 0.3, self.min_green + 10), ('green_ns', 'green_ew'))
-
-                if self.current_ns_waiting_time >= 25:
-                    if self.current_ew_queue_length > 0 or self.current_ew_waiting_time > 0:
-                        # Jika waktu tunggu NS sangat tinggi, pastikan EW mendapatkan minimum yang wajar dan NS tidak terlalu lama
-                        csp.addConstraint(lambda ns, ew: ew >= max(ns * 0.3, self.min_green + 10), ('green_ns', 'green_ew'))
-                        csp.addConstraint(lambda ns, ew: ns <= self.max_green - 10, ('green_ns', 'green_ew'))
-
-                # Batasan baru: Paksa NS ke lampu hijau minimum jika permintaan sangat rendah
-                if self.current_ns_waiting_time < 1.0 and self.current_ns_queue_length < 5:
-                    csp.addConstraint(lambda ns_val: ns_val == self.min_green, ('green_ns',))
-                # Batasan baru: Paksa EW ke lampu hijau minimum jika permintaan sangat rendah
-                if self.current_ew_waiting_time < 1.0 and self.current_ew_queue_length < 5:
-                    csp.addConstraint(lambda ew_val: ew_val == self.min_green, ('green_ew',))
-
-                # Coba temukan solusi untuk CSP
-                solution = csp.getSolution()
-
-                if solution:
-                    green_ns_final = solution['green_ns']
-                    green_ew_final = solution['green_ew']
-                else:
-                    # Cadangan jika tidak ada solusi CSP yang ditemukan (seharusnya jarang dengan batasan yang terdefinisi dengan baik)
-                    print(f"Peringatan: Tidak ada solusi CSP ditemukan pada langkah {self.step}. Menggunakan cadangan ke target yang disesuaikan.")
-                    green_ns_final = adjusted_target_green_ns
-                    green_ew_final = adjusted_target_green_ew
-
-                # Cetak keputusan dan metrik siklus saat ini
-                print(f"Langkah {self.step}:")
-                print(f"  Antrian NS: {self.current_ns_queue_length}, Waktu Tunggu NS: {self.current_ns_waiting_time:.2f}")
-                print(f"  Antrian EW: {self.current_ew_queue_length}, Waktu Tunggu EW: {self.current_ew_waiting_time:.2f}")
-                print(f"  Penyesuaian RL: NS={adjustment_ns}s, EW={adjustment_ew}s (Indeks Tindakan: {action_index})")
-                print(f"  Target NS (berbasis Permintaan): {target_green_ns}s, Target EW (berbasis Permintaan): {target_green_ew}s")
-                print(f"  Target NS yang disesuaikan: {adjusted_target_green_ns}s, Target EW yang disesuaikan: {adjusted_target_green_ew}s")
-                print(f"  Hijau NS Akhir: {green_ns_final}s, Hijau EW Akhir: {green_ew_final}s")
-                if solution:
-                    print(f"  Solusi CSP ditemukan.")
-                else:
-                    print(f"  Tidak ada solusi CSP ditemukan, menggunakan nilai cadangan.")
-                print(f"  Epsilon (Tingkat Eksplorasi): {self.exploration_rate:.4f}") # Menggunakan self.exploration_rate
-                print("-" * 30)
-
-                # 6. Jalankan fase lampu lalu lintas dengan waktu hijau yang ditentukan
-                self._run_phase(green_ns_final, 0) # Fase Hijau NS
-                if self.step >= self.max_simulation_steps: break # Periksa apakah simulasi berakhir selama fase
-                self._run_phase(self.yellow_time, 1) # Fase Kuning NS
-                if self.step >= self.max_simulation_steps: break
-                self._run_phase(green_ew_final, 2) # Fase Hijau EW
-                if self.step >= self.max_simulation_steps: break
-                self._run_phase(self.yellow_time, 3) # Fase Kuning EW
-                if self.step >= self.max_simulation_steps: break
-
-                # 7. Dapatkan keadaan berikutnya dan hitung hadiah untuk pembaruan RL
-                self._get_current_lane_metrics() # Perbarui metrik setelah siklus penuh untuk next_state
-                next_state = self._get_state()
-                reward = self._calculate_reward()
-
-                # 8. Perbarui tabel-Q menggunakan pengalaman yang diamati
-                self._update_q_table(current_state, action_index, reward, next_state)
-
-                # 9. Kurangi epsilon untuk secara bertahap mengurangi eksplorasi
-                self.exploration_rate = max(self.min_epsilon, self.exploration_rate * self.epsilon_decay_rate)
-
-            # --- Ringkasan Simulasi setelah loop utama selesai ---
-            # Hitung ulang total kendaraan yang berangkat, karena beberapa mungkin telah tiba di siklus terakhir
-            self.total_vehicles_departed = len(self.vehicle_travel_times)
-            if self.total_vehicles_departed > 0:
-                avg_waiting_time = self.total_waiting_time / self.total_vehicles_departed
-                total_travel_time = sum(self.vehicle_travel_times.values())
-                avg_travel_time = total_travel_time / self.total_vehicles_departed if self.total_vehicles_departed > 0 else 0
-                throughput = self.total_vehicles_departed / self.step if self.step > 0 else 0
-
-                print(f"\n--- Ringkasan Simulasi (Lampu Lalu Lintas Adaptif CSP + RL) ---")
-                print(f"Simulasi berakhir pada langkah {self.step}. Total kendaraan berangkat: {self.total_vehicles_departed}")
-                print(f"Total waktu tunggu: {self.total_waiting_time:.2f}s, Waktu tunggu rata-rata per kendaraan: {avg_waiting_time:.2f}s")
-                print(f"Total waktu tempuh: {total_travel_time:.2f}s, Waktu tempuh rata-rata per kendaraan: {avg_travel_time:.2f}s")
-                print(f"Throughput: {throughput:.4f} kendaraan/langkah")
+        Langkah 1-5 satu siklus: keadaan RL, tindakan, target berbasis permintaan, dan solusi CSP.
+        Mengembalikan (keadaan, indeks tindakan, hijau NS akhir, hijau EW akhir).
+        """
+        # 1. Keadaan saat ini dari metrik lalu lintas yang baru diperbarui (sebelum keputusan RL/CSP)
+        current_state = self._get_state()
+
+        # 2. Agen RL memilih tindakan (penyesuaian waktu hijau) berdasarkan keadaan saat ini
+        action_index = self._choose_action(current_state)
+        adjustment_ns, adjustment_ew = self.actions[action_index]
+
+        # 3. Hitung waktu hijau target CSP awal berdasarkan rasio permintaan saat ini
+        ns_demand_metric, ew_demand_metric = self._demand_metrics()
+
+        # Pastikan metrik permintaan setidaknya 1 untuk menghindari pembagian dengan nol
+        ns_demand_metric = max(ns_demand_metric, 1)
+        ew_demand_metric = max(ew_demand_metric, 1)
+
+        total_demand = ns_demand_metric + ew_demand_metric
+        ns_ratio = ns_demand_metric / total_demand
+        ew_ratio = ew_demand_metric / total_demand
+
+        total_green_budget = self.cycle_length - (2 * self.yellow_time) # Total waktu hijau yang tersedia dalam satu siklus
+        target_green_ns = int(total_green_budget * ns_ratio)
+        target_green_ew = int(total_green_budget * ew_ratio)
+
+        # 4. Terapkan penyesuaian RL ke waktu hijau target berbasis permintaan
+        # Pastikan target yang disesuaikan tetap dalam batas waktu hijau min/maks
+        adjusted_target_green_ns = max(self.min_green, min(self.max_green, target_green_ns + adjustment_ns))
+        adjusted_target_green_ew = max(self.min_green, min(self.max_green, target_green_ew + adjustment_ew))
+
+        # 5. CSP menyelesaikan waktu hijau akhir, dipandu oleh target yang disesuaikan RL.
+        # Batasan kondisional (waktu tunggu, antrian, permintaan rendah) dinormalkan menjadi flag,
+        # lalu solusi diambil dari tabel green-split yang identik dengan BacktrackingSolver
+        flags = constraint_flags(self.current_ns_waiting_time, self.current_ew_waiting_time,
+                                 self.current_ns_queue_length, self.current_ew_queue_length)
+        with self._section('csp_solve'):
+            solution = self.green_split.solve(adjusted_target_green_ns, adjusted_target_green_ew, flags)
+
+        if solution:
+            green_ns_final = solution['green_ns']
+            green_ew_final = solution['green_ew']
+        else:
+            # Cadangan jika tidak ada solusi CSP yang ditemukan (seharusnya jarang dengan batasan yang terdefinisi dengan baik)
+            if self.verbosity >= 1:
+                print(f"Peringatan: Tidak ada solusi CSP ditemukan pada langkah {self.step}. Menggunakan cadangan ke target yang disesuaikan.")
+            green_ns_final = adjusted_target_green_ns
+            green_ew_final = adjusted_target_green_ew
+
+        # Cetak keputusan dan metrik siklus saat ini
+        if self.verbosity >= 2:
+            print(f"Langkah {self.step}:")
+            print(f"  Antrian NS: {self.current_ns_queue_length}, Waktu Tunggu NS: {self.current_ns_waiting_time:.2f}")
+            print(f"  Antrian EW: {self.current_ew_queue_length}, Waktu Tunggu EW: {self.current_ew_waiting_time:.2f}")
+            print(f"  Penyesuaian RL: NS={adjustment_ns}s, EW={adjustment_ew}s (Indeks Tindakan: {action_index})")
+            print(f"  Target NS (berbasis Permintaan): {target_green_ns}s, Target EW (berbasis Permintaan): {target_green_ew}s")
+            print(f"  Target NS yang disesuaikan: {adjusted_target_green_ns}s, Target EW yang disesuaikan: {adjusted_target_green_ew}s")
+            print(f"  Hijau NS Akhir: {green_ns_final}s, Hijau EW Akhir: {green_ew_final}s")
+            if solution:
+                print(f"  Solusi CSP ditemukan.")
             else:
-                print("Tidak ada kendaraan yang berangkat selama simulasi.")
-        except Exception as e:
-            print(f"Simulasi dihentikan dengan kesalahan: {e}")
-            import traceback
-            traceback.print_exc() # Cetak traceback lengkap untuk debugging
-        finally:
-            self.env.close() # Tutup koneksi lingkungan SUMO
-            print("Koneksi TraCI berhasil ditutup")
-            sys.stdout.flush() # Pastikan semua pernyataan print sudah di-flush ke konsol
+                print(f"  Tidak ada solusi CSP ditemukan, menggunakan nilai cadangan.")
+            print(f"  Epsilon (Tingkat Eksplorasi): {self.exploration_rate:.4f}") # Menggunakan self.exploration_rate
+            print("-" * 30)
+
+        return current_state, action_index, green_ns_final, green_ew_final
+
+    def _finish_cycle(self, current_state, action_index):
+        """Langkah 7-9 setelah siklus selesai: keadaan berikutnya, hadiah, pembaruan tabel-Q, dan peluruhan epsilon."""
+        with self._section('rl_update'):
+            # 7. Dapatkan keadaan berikutnya dan hitung hadiah untuk pembaruan RL
+            self._get_current_lane_metrics() # Perbarui metrik setelah siklus penuh untuk next_state
+            next_state = self._get_state()
+            reward = self._calculate_reward()
+
+            # 8. Perbarui tabel-Q menggunakan pengalaman yang diamati
+            self._update_q_table(current_state, action_index, reward, next_state)
+            if self.replay is not None:
+                self.replay.append(current_state, action_index, reward, next_state)
+
+            # 9. Kurangi epsilon untuk secara bertahap mengurangi eksplorasi
+            self.exploration_rate = max(self.min_epsilon, self.exploration_rate * self.epsilon_decay_rate)
+
+    def cycle_plan(self, green_ns, green_ew):
+        """Fase satu siklus sebagai daftar (fase, durasi); hijau NS pada fase yang melayani jalur NS."""
+        return self.junction.cycle(green_ns, green_ew, self.yellow_time)
+
+    def decide_cycle(self, snapshot):
+        """Satu siklus CSP + RL: hijau NS, kuning NS, hijau EW, kuning EW."""
+        current_state, action_index, green_ns_final, green_ew_final = self._plan_cycle()
+        self._pending_cycle = (current_state, action_index)
+        return self.cycle_plan(green_ns_final, green_ew_final)
+
+    def end_cycle(self):
+        self._finish_cycle(*self._pending_cycle)
+
+    def print_summary(self, summary):
+        super().print_summary(summary)
+        if summary['vehicles_departed'] > 0 and isinstance(self.green_split, CachedCSPSolver):
+            info = self.green_split.cache_info()
+            print(f"Cache CSP: {info['hits']} hit, {info['misses']} miss ({info['size']}/{info['maxsize']} entri)")
 
 if __name__ == "__main__":
-    csp = TrafficLightCSP()
-    csp.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Lampu lalu lintas adaptif CSP + RL")
+    parser.add_argument('--gui', action='store_true', help="Jalankan sumo-gui (default: sumo headless)")
+    parser.add_argument('--backend', default='traci', choices=SumoEnv.backends)
+    parser.add_argument('--steps', type=int, default=500, help="Langkah simulasi maksimum")
+    parser.add_argument('--route-file', default=None, help="File rute pengganti (default: dari intersection.sumocfg)")
+    parser.add_argument('--seed', type=int, default=None, help="Seed SUMO dan eksplorasi RL")
+    parser.add_argument('--log-file', default='queue_length.txt', help="Log per langkah ('.txt' CSV, '.npz' kolomnar)")
+    parser.add_argument('--csp-solver', default='table', choices=['table', 'backtracking'])
+    parser.add_argument('--demand-source', default='vehicles', choices=['vehicles', 'detectors'])
+    parser.add_argument('--verbosity', type=int, default=2, choices=[0, 1, 2],
+                        help="0 = senyap, 1 = ringkasan akhir, 2 = rincian per siklus")
+    parser.add_argument('--sample-interval', type=int, default=1,
+                        help="Langkah per pembacaan metrik; nilai >= fase terpanjang = satu panggilan TraCI per fase")
+    parser.add_argument('--replay-file', default=None, help="Tambahkan transisi RL ke file replay biner")
+    parser.add_argument('--profile', action='store_true', help="Cetak ringkasan instrumentasi di akhir run")
+    parser.add_argument('--trace-file', default=None, help="Trace instrumentasi per langkah (mengaktifkan --profile)")
+    parser.add_argument('--store', default=None, metavar='DIR',
+                        help="Tulis run ke ResultsStore DIR untuk perbandingan.py (membutuhkan --seed)")
+    args = parser.parse_args()
+    if args.store is not None and args.seed is None:
+        parser.error("--store membutuhkan --seed (run di store dikunci per seed)")
+    if args.store is not None and args.sample_interval > 1:
+        parser.error("--store membutuhkan --sample-interval 1 (ringkasan fast-forward hanya perkiraan)")
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    env = SumoEnv(label='csp_sim', gui_f=args.gui, backend=args.backend, route_file=args.route_file, seed=args.seed,
+                  sumo_args=sumo_console_args(args.verbosity), per_vehicle=args.demand_source == 'vehicles')
+    instrumentation = Instrumentation(trace_file=args.trace_file) if args.profile or args.trace_file else None
+    csp = TrafficLightCSP(env=env, log_file=args.log_file, csp_solver=args.csp_solver,
+                          demand_source=args.demand_source, instrumentation=instrumentation,
+                          max_simulation_steps=args.steps, verbosity=args.verbosity,
+                          sample_interval=args.sample_interval, replay_file=args.replay_file)
+    summary = csp.run()
+    if args.store is not None:
+        print(f"Run disimpan ke {store_run(args.store, 'csp', args.route_file, args.seed, args.log_file, summary)}")
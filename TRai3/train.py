@@ -0,0 +1,155 @@
+import argparse
+import os
+import random
+import numpy as np
+
+from sumoenv import SumoEnv
+from traffic_light_csp import TrafficLightCSP
+from vec_env import VecSumoEnv
+
+
+def train(episodes, checkpoint_path, checkpoint_every=1, resume=False, warmup_steps=0,
+          max_steps=500, backend='traci', log_file=os.devnull, seed=None, replay_file=None):
+    """
+    Melatih agen CSP+RL selama beberapa episode dalam satu proses SUMO.
+    Setiap episode dimulai dari state hasil warm-up (SumoEnv reset_mode='state'), sedangkan
+    tabel-Q dan epsilon berlanjut antar episode dan disimpan ke checkpoint secara berkala.
+    Dengan replay_file semua transisi juga disimpan untuk pelatihan offline (offline_train.py).
+    """
+    if seed is not None:
+        random.seed(seed)
+    env = SumoEnv(label='csp_train', gui_f=False, backend=backend, seed=seed,
+                  sumo_args=['--no-step-log', '--no-warnings'],
+                  reset_mode='state', warmup_steps=warmup_steps)
+    # Cetakan per siklus dan ringkasan per episode dari run() tidak ditampilkan selama pelatihan
+    csp = TrafficLightCSP(env=env, log_file=log_file, max_simulation_steps=max_steps, verbosity=0,
+                          replay_file=replay_file)
+    if resume and os.path.exists(checkpoint_path):
+        csp.load_checkpoint(checkpoint_path)
+        print(f"Melanjutkan dari checkpoint {checkpoint_path} (epsilon={csp.exploration_rate:.4f})")
+
+    summaries = []
+    try:
+        for episode in range(1, episodes + 1):
+            summary = csp.run(close_env=False)
+            summaries.append(summary)
+            print(f"Episode {episode}/{episodes}: waktu tunggu rata-rata {summary['avg_waiting_time']:.2f}s, "
+                  f"throughput {summary['throughput']:.4f}, epsilon {csp.exploration_rate:.4f}")
+            if episode % checkpoint_every == 0 or episode == episodes:
+                csp.save_checkpoint(checkpoint_path)
+    finally:
+        env.close()
+    return summaries
+
+
+def _load_metrics(csp, metrics):
+    # Satu baris VecSumoEnv.metrics (METRIC_FIELDS) sebagai metrik saat ini pengendali
+    csp.current_ns_queue_length, csp.current_ew_queue_length = int(metrics[0]), int(metrics[1])
+    csp.current_ns_waiting_time, csp.current_ew_waiting_time = float(metrics[2]), float(metrics[3])
+
+
+def train_batched(num_envs, episodes, checkpoint_path, checkpoint_every=1, resume=False, warmup_steps=0,
+                  max_steps=500, backend='traci', seed=None, replay_file=None):
+    """
+    Melatih agen CSP+RL atas num_envs simulasi SUMO yang berjalan serentak di proses worker (VecSumoEnv).
+
+    Setiap siklus, keputusan untuk semua lingkungan diambil dari satu tabel-Q bersama dengan logika
+    TrafficLightCSP yang sama (_plan_cycle), siklusnya dijalankan paralel (step_cycles), lalu K transisi
+    diterapkan sebagai satu pembaruan batch QTable (galat TD pasangan (s, a) yang sama dirata-rata).
+    Epsilon meluruh sekali per transisi, seperti pada train(). Lingkungan ke-i memakai seed seed + i
+    (default i). Siklus tidak dipotong pada max_steps: lingkungan berhenti setelah siklus yang
+    melewatinya, jadi semua transisi lengkap.
+    """
+    if seed is not None:
+        random.seed(seed)
+    seeds = [(seed or 0) + i for i in range(num_envs)]
+    # Pengendali tanpa simulasi sendiri: hanya tabel-Q, parameter RL, dan solver CSP yang dipakai
+    csp = TrafficLightCSP(log_file=os.devnull, verbosity=0, replay_file=replay_file)
+    if resume and os.path.exists(checkpoint_path):
+        csp.load_checkpoint(checkpoint_path)
+        print(f"Melanjutkan dari checkpoint {checkpoint_path} (epsilon={csp.exploration_rate:.4f})")
+
+    summaries = []
+    with VecSumoEnv(num_envs, seeds=seeds, backend=backend, sumo_args=['--no-step-log', '--no-warnings'],
+                    reset_mode='state', warmup_steps=warmup_steps) as vec_env:
+        for episode in range(1, episodes + 1):
+            vec_env.reset()
+            steps = np.zeros(num_envs, dtype=np.int64)
+            total_waiting = np.zeros(num_envs)
+            rewards_sum = 0.0
+            transitions = 0
+            while (steps < max_steps).any():
+                active = np.flatnonzero(steps < max_steps)
+                plans = [None] * num_envs
+                pending = {}
+                for i in active:
+                    _load_metrics(csp, vec_env.metrics[i])
+                    state, action_index, green_ns, green_ew = csp._plan_cycle()
+                    plans[i] = csp.cycle_plan(green_ns, green_ew)
+                    pending[i] = (state, action_index)
+                    steps[i] += sum(duration for _, duration in plans[i])
+                _, waiting_times, metrics = vec_env.step_cycles(plans)
+
+                states, actions, rewards, next_states = [], [], [], []
+                for i in active:
+                    total_waiting[i] += waiting_times[i]
+                    _load_metrics(csp, metrics[i])
+                    states.append(pending[i][0])
+                    actions.append(pending[i][1])
+                    rewards.append(csp._calculate_reward())
+                    next_states.append(csp._get_state())
+                    if csp.replay is not None:
+                        csp.replay.append(states[-1], actions[-1], rewards[-1], next_states[-1])
+                csp.q_table.update(np.array(states), np.array(actions), np.array(rewards), np.array(next_states),
+                                   csp.learning_rate, csp.discount_factor, average=True)
+                csp.exploration_rate = max(csp.min_epsilon,
+                                           csp.exploration_rate * csp.epsilon_decay_rate ** len(active))
+                rewards_sum += sum(rewards)
+                transitions += len(active)
+
+            summary = {'steps': steps.tolist(), 'waiting_time_per_step': (total_waiting / steps).tolist(),
+                       'avg_reward': rewards_sum / transitions}
+            summaries.append(summary)
+            print(f"Episode {episode}/{episodes}: waktu tunggu per langkah rata-rata "
+                  f"{np.mean(summary['waiting_time_per_step']):.2f}s ({num_envs} lingkungan), "
+                  f"hadiah rata-rata {summary['avg_reward']:.2f}, epsilon {csp.exploration_rate:.4f}")
+            if episode % checkpoint_every == 0 or episode == episodes:
+                csp.save_checkpoint(checkpoint_path)
+    return summaries
+
+
+def evaluate(checkpoint_path, gui_f=False, backend='traci', max_steps=500, epsilon=None):
+    """Menjalankan satu episode evaluasi yang di-warm-start dari checkpoint."""
+    csp = TrafficLightCSP(gui_f=gui_f, backend=backend, max_simulation_steps=max_steps)
+    csp.load_checkpoint(checkpoint_path)
+    if epsilon is not None:
+        csp.exploration_rate = epsilon
+    return csp.run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pelatihan multi-episode CSP+RL dengan checkpoint tabel-Q")
+    parser.add_argument('--episodes', type=int, default=50)
+    parser.add_argument('--checkpoint', default='q_table.npz')
+    parser.add_argument('--checkpoint-every', type=int, default=1)
+    parser.add_argument('--resume', action='store_true', help="Lanjutkan dari checkpoint yang ada")
+    parser.add_argument('--warmup-steps', type=int, default=0)
+    parser.add_argument('--steps', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--backend', default='traci', choices=SumoEnv.backends)
+    parser.add_argument('--replay-file', default=None, help="Tambahkan transisi RL ke file replay biner")
+    parser.add_argument('--envs', type=int, default=1,
+                        help="Jumlah simulasi paralel; > 1 = pelatihan batch dengan VecSumoEnv")
+    parser.add_argument('--evaluate', action='store_true', help="Jalankan satu episode evaluasi dari checkpoint")
+    parser.add_argument('--epsilon', type=float, default=None, help="Epsilon untuk evaluasi (default: dari checkpoint)")
+    parser.add_argument('--gui', action='store_true')
+    args = parser.parse_args()
+
+    if args.evaluate:
+        evaluate(args.checkpoint, args.gui, args.backend, args.steps, args.epsilon)
+    elif args.envs > 1:
+        train_batched(args.envs, args.episodes, args.checkpoint, args.checkpoint_every, args.resume,
+                      args.warmup_steps, args.steps, args.backend, seed=args.seed, replay_file=args.replay_file)
+    else:
+        train(args.episodes, args.checkpoint, args.checkpoint_every, args.resume,
+              args.warmup_steps, args.steps, args.backend, seed=args.seed, replay_file=args.replay_file)
@@ -0,0 +1,219 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+import traceback
+from multiprocessing import shared_memory
+import numpy as np
+
+from sumoenv import SumoEnv
+
+# Kolom array metrics: metrik StepSnapshot per lingkungan
+METRIC_FIELDS = ('ns_queue', 'ew_queue', 'ns_avg_wait', 'ew_avg_wait')
+
+
+def _attach(name, shape, dtype):
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _worker(index, conn, num_envs, shm_names, env_kwargs):
+    """
+    Loop proses worker: menjalankan satu SumoEnv dan menulis observasi, waktu tunggu, dan
+    metrik langsung ke baris index pada shared memory. Lewat pipe hanya perintah dan status yang dikirim.
+    """
+    obs_shm, obs = _attach(shm_names[0], (num_envs, SumoEnv.state_size), np.float32)
+    waiting_shm, waiting = _attach(shm_names[1], (num_envs,), np.float64)
+    metrics_shm, metrics = _attach(shm_names[2], (num_envs, len(METRIC_FIELDS)), np.float64)
+    env = None
+    try:
+        env = SumoEnv(**env_kwargs)
+        while True:
+            cmd, data = conn.recv()
+            if cmd == 'close':
+                break
+            try:
+                cycle_waiting = None
+                if cmd == 'reset':
+                    env.reset()
+                elif cmd == 'step':
+                    action, num_steps = data
+                    if action is not None:
+                        env.set_traffic_light_phase(*action)
+                    for _ in range(num_steps):
+                        env.simulation_step()
+                elif cmd == 'cycle':
+                    # Satu siklus penuh: fase (fase, durasi) dijalankan berurutan; waktu tunggu dijumlahkan per langkah
+                    cycle_waiting = 0.0
+                    for phase, duration in data:
+                        env.set_traffic_light_phase(phase, duration)
+                        for _ in range(int(duration)):
+                            env.simulation_step()
+                            cycle_waiting += env.get_snapshot().waiting_time
+                env.get_state(out=obs[index])
+                snapshot = env.get_snapshot()
+                waiting[index] = snapshot.waiting_time if cycle_waiting is None else cycle_waiting
+                metrics[index] = [getattr(snapshot, field) for field in METRIC_FIELDS]
+                conn.send(('ok', None))
+            except Exception:
+                conn.send(('error', traceback.format_exc()))
+    finally:
+        if env is not None:
+            env.close()
+        # View NumPy harus dilepas sebelum shared memory ditutup
+        del obs, waiting, metrics
+        for shm in (obs_shm, waiting_shm, metrics_shm):
+            shm.close()
+        conn.close()
+
+
+class VecSumoEnv:
+    """
+    K instans SumoEnv di proses worker terpisah yang dijalankan serentak (lockstep).
+
+    Observasi (K, state_size), waktu tunggu (K,), dan metrik persimpangan (K, 4) ditulis worker
+    ke buffer shared memory, jadi tidak ada array yang di-pickle setiap langkah. step() memajukan
+    semua lingkungan langkah yang sama; step_cycles() menjalankan satu siklus lampu per lingkungan
+    dengan durasi fase masing-masing (dipakai train.train_batched). Array yang
+    dikembalikan reset()/step() adalah view ke buffer tersebut dan ditimpa pada langkah berikutnya;
+    salin jika perlu disimpan.
+
+    Output SUMO setiap worker (mis. detektor) ditulis dengan --output-prefix <output_dir>/vec<i>_;
+    tanpa output_dir dipakai direktori sementara yang dihapus saat close().
+    """
+    def __init__(self, num_envs, seeds=None, route_files=None, start_method=None, output_dir=None, **env_kwargs):
+        # Setiap lingkungan mendapat seed sendiri (default 0..K-1) agar lalu lintasnya berbeda
+        seeds = list(range(num_envs)) if seeds is None else list(seeds)
+        if len(seeds) != num_envs:
+            raise ValueError(f"Jumlah seed ({len(seeds)}) harus sama dengan num_envs ({num_envs})")
+        if route_files is not None and len(route_files) != num_envs:
+            raise ValueError(f"Jumlah file rute ({len(route_files)}) harus sama dengan num_envs ({num_envs})")
+
+        self.num_envs = num_envs
+        # Worker berbagi direktori kerja, jadi tanpa prefix semuanya menimpa file output yang sama
+        self._tmp_dir = tempfile.TemporaryDirectory(prefix='vec_env_') if output_dir is None else None
+        output_dir = self._tmp_dir.name if output_dir is None else output_dir
+        self._shms = [
+            shared_memory.SharedMemory(create=True, size=num_envs * SumoEnv.state_size * 4),
+            shared_memory.SharedMemory(create=True, size=num_envs * 8),
+            shared_memory.SharedMemory(create=True, size=num_envs * len(METRIC_FIELDS) * 8),
+        ]
+        self.observations = np.ndarray((num_envs, SumoEnv.state_size), dtype=np.float32, buffer=self._shms[0].buf)
+        self.waiting_times = np.ndarray((num_envs,), dtype=np.float64, buffer=self._shms[1].buf)
+        self.metrics = np.ndarray((num_envs, len(METRIC_FIELDS)), dtype=np.float64, buffer=self._shms[2].buf)
+
+        ctx = multiprocessing.get_context(start_method)
+        shm_names = [shm.name for shm in self._shms]
+        self._conns = []
+        self._processes = []
+        for i in range(num_envs):
+            kwargs = dict(env_kwargs, label=f"vec{i}", gui_f=False, seed=seeds[i],
+                          sumo_args=['--output-prefix', os.path.join(output_dir, f"vec{i}_")]
+                          + list(env_kwargs.get('sumo_args') or []))
+            if route_files is not None:
+                kwargs['route_file'] = route_files[i]
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(target=_worker, args=(i, child_conn, num_envs, shm_names, kwargs), daemon=True)
+            process.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._processes.append(process)
+        self.closed = False
+
+    def _wait(self, indices=None):
+        errors = []
+        for i in range(self.num_envs) if indices is None else indices:
+            status, message = self._conns[i].recv()
+            if status == 'error':
+                errors.append(f"Worker {i}:\n{message}")
+        if errors:
+            raise RuntimeError("\n".join(errors))
+
+    def reset(self):
+        """Mereset semua lingkungan; mengembalikan observasi (K, state_size)."""
+        for conn in self._conns:
+            conn.send(('reset', None))
+        self._wait()
+        return self.observations
+
+    def step_async(self, actions=None, num_steps=1):
+        """
+        Mengirim perintah langkah ke semua worker tanpa menunggu.
+        actions: None atau daftar K elemen (fase, durasi) / None per lingkungan.
+        """
+        for i, conn in enumerate(self._conns):
+            conn.send(('step', (None if actions is None else actions[i], num_steps)))
+
+    def step_wait(self):
+        self._wait()
+        return self.observations, self.waiting_times
+
+    def step(self, actions=None, num_steps=1):
+        """Memajukan semua lingkungan num_steps langkah; mengembalikan (observasi (K, 124), waktu tunggu (K,))."""
+        self.step_async(actions, num_steps)
+        return self.step_wait()
+
+    def step_cycles(self, plans):
+        """
+        Menjalankan satu siklus per lingkungan: plans berisi K daftar (fase, durasi), atau None untuk
+        lingkungan yang dilewati. Panjang siklus boleh berbeda; pemanggilan kembali setelah semua
+        siklus selesai. Mengembalikan (observasi, jumlah waktu tunggu per langkah selama siklus, metrik)
+        akhir siklus; baris lingkungan yang dilewati tidak berubah.
+        """
+        active = [i for i, plan in enumerate(plans) if plan is not None]
+        for i in active:
+            self._conns[i].send(('cycle', list(plans[i])))
+        self._wait(active)
+        return self.observations, self.waiting_times, self.metrics
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for conn in self._conns:
+            try:
+                conn.send(('close', None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        for conn in self._conns:
+            conn.close()
+        del self.observations, self.waiting_times, self.metrics
+        for shm in self._shms:
+            shm.close()
+            shm.unlink()
+        if self._tmp_dir is not None:
+            self._tmp_dir.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mengukur throughput VecSumoEnv (langkah lingkungan per detik)")
+    parser.add_argument('--envs', type=int, default=4)
+    parser.add_argument('--steps', type=int, default=500)
+    parser.add_argument('--backend', default='traci', choices=SumoEnv.backends)
+    args = parser.parse_args()
+
+    with VecSumoEnv(args.envs, backend=args.backend, sumo_args=['--no-step-log', '--no-warnings']) as vec_env:
+        vec_env.reset()
+        start = time.perf_counter()
+        total_waiting = np.zeros(args.envs)
+        for step in range(args.steps):
+            # Ganti fase setiap 30 langkah (fase hijau 0 dan 2), semua lingkungan serentak
+            actions = [((step // 30) % 2 * 2, 30)] * args.envs if step % 30 == 0 else None
+            observations, waiting_times = vec_env.step(actions)
+            total_waiting += waiting_times
+        elapsed = time.perf_counter() - start
+
+    print(f"{args.envs} lingkungan x {args.steps} langkah dalam {elapsed:.2f}s "
+          f"({args.envs * args.steps / elapsed:.0f} langkah lingkungan/detik)")
+    print(f"Total waktu tunggu per lingkungan: {np.round(total_waiting, 1)}")